@@ -0,0 +1,222 @@
+"""Offline transports for the YouTube Data API client
+
+RecordingTransport saves live API responses to a fixture directory,
+ReplayTransport serves them back without any network, and
+SyntheticTransport generates playlists of any size with configurable
+latency and injected errors. Pass one to PlaylistCalculator(transport=...)
+to benchmark or regression-test the fetch pipeline on an air-gapped box.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import zlib
+
+import requests
+
+from playlist_core import HTTPTransport
+
+
+class FixtureResponse:
+    """Minimal stand-in for requests.Response (status_code, headers, text, json())"""
+    def __init__(self, status_code, body="", headers=None):
+        self.status_code = status_code
+        self.text = body if isinstance(body, str) else json.dumps(body)
+        self.content = self.text.encode()
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+def fixture_name(endpoint, params):
+    """Stable file name for a request; the API key never takes part in it"""
+    canonical = json.dumps([endpoint, request_params(params)], sort_keys=True)
+    return f"{endpoint}-{hashlib.sha1(canonical.encode()).hexdigest()[:16]}.json"
+
+def request_params(params):
+    """Request parameters without the API key, with values as strings"""
+    return {name: str(value) for name, value in params.items() if name != 'key'}
+
+def error_response(status_code, reason, message):
+    """An API-style error body, as the real service returns it"""
+    return FixtureResponse(status_code, {
+        'error': {'code': status_code, 'message': message, 'errors': [{'reason': reason}]}
+    })
+
+class RecordingTransport:
+    """Passes requests to a live transport and saves every response to disk"""
+    def __init__(self, directory, transport=None):
+        self.directory = directory
+        self.transport = transport or HTTPTransport()
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, endpoint, params, headers=None):
+        response = self.transport.send(endpoint, params, headers)
+
+        # A 304 only means "same as before"; the original 200 is the fixture
+        if response.status_code != 304:
+            self.save(endpoint, params, response)
+        return response
+
+    def save(self, endpoint, params, response):
+        fixture = {
+            'endpoint': endpoint,
+            'params': request_params(params),
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in ('Retry-After',)
+                        if name in response.headers},
+            'body': response.text,
+        }
+
+        # Write to a temporary file first so a replay never sees half a fixture
+        path = os.path.join(self.directory, fixture_name(endpoint, params))
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(fixture, handle, indent=1)
+        os.replace(temp_path, path)
+
+    def close(self):
+        self.transport.close()
+
+class ReplayTransport:
+    """Serves recorded fixtures; unknown requests get a 404 API error"""
+    def __init__(self, directory):
+        self.directory = directory
+        self.fixtures = {}
+        self.lock = threading.Lock()
+
+    def load(self, name):
+        with self.lock:
+            if name not in self.fixtures:
+                path = os.path.join(self.directory, name)
+                try:
+                    with open(path, encoding="utf-8") as handle:
+                        self.fixtures[name] = json.load(handle)
+                except FileNotFoundError:
+                    self.fixtures[name] = None
+            return self.fixtures[name]
+
+    def send(self, endpoint, params, headers=None):
+        fixture = self.load(fixture_name(endpoint, params))
+        if fixture is None:
+            return error_response(404, "fixtureMissing",
+                                  f"No recorded response for {endpoint} {request_params(params)}")
+
+        response = FixtureResponse(fixture['status'], fixture['body'], fixture['headers'])
+
+        # Conditional requests behave like the live API
+        etag = (headers or {}).get("If-None-Match")
+        if etag and response.status_code == 200 and response.json().get('etag') == etag:
+            return FixtureResponse(304)
+        return response
+
+    def close(self):
+        pass
+
+class SyntheticTransport:
+    """Generates deterministic playlists of any size without a network
+
+    Every playlist ID has `videos` entries (or the size given in
+    `playlists`), and durations are derived from the video IDs, so runs
+    are repeatable. Each request sleeps latency plus up to jitter seconds;
+    error_rate of them fail with error_status, and connection_error_rate
+    raise a ConnectionError as a dropped connection would.
+    """
+    def __init__(self, videos=1000, playlists=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, connection_error_rate=0.0,
+                 max_duration=3600, seed=None):
+        self.videos = videos
+        self.playlists = playlists or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.connection_error_rate = connection_error_rate
+        self.max_duration = max_duration
+
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def playlist_size(self, playlist_id):
+        return self.playlists.get(playlist_id, self.videos)
+
+    def video_id(self, playlist_id, position):
+        return f"{zlib.crc32(playlist_id.encode()):08x}{position:06d}"
+
+    def video_seconds(self, video_id):
+        return 1 + zlib.crc32(video_id.encode()) % self.max_duration
+
+    def send(self, endpoint, params, headers=None):
+        with self.lock:
+            self.requests += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            roll = self.random.random()
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if roll < self.connection_error_rate:
+            with self.lock:
+                self.errors += 1
+            raise requests.ConnectionError("Injected connection error")
+        if roll < self.connection_error_rate + self.error_rate:
+            with self.lock:
+                self.errors += 1
+            return error_response(self.error_status, "backendError", "Injected error")
+
+        if endpoint == 'playlistItems':
+            return self.playlist_page(params, headers)
+        if endpoint == 'videos':
+            return self.video_details(params)
+        if endpoint == 'channels':
+            return self.channel_details(params)
+        return error_response(404, "notFound", f"Unknown endpoint: {endpoint}")
+
+    def playlist_page(self, params, headers):
+        playlist_id = params['playlistId']
+        size = self.playlist_size(playlist_id)
+        offset = int(params.get('pageToken') or 0)
+        count = min(int(params.get('maxResults', 50)), 50, max(size - offset, 0))
+
+        # Pages never change, so an ETag can be derived from the request
+        etag = f'"{playlist_id}-{size}-{offset}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return FixtureResponse(304)
+
+        items = []
+        for position in range(offset, offset + count):
+            video_id = self.video_id(playlist_id, position)
+            if params.get('part') == 'snippet':
+                items.append({'snippet': {'title': f"Video {position + 1}",
+                                          'resourceId': {'videoId': video_id}}})
+            else:
+                items.append({'contentDetails': {'videoId': video_id}})
+
+        body = {'etag': etag, 'pageInfo': {'totalResults': size}, 'items': items}
+        if offset + count < size:
+            body['nextPageToken'] = str(offset + count)
+        return FixtureResponse(200, body)
+
+    def video_details(self, params):
+        items = []
+        for video_id in params['id'].split(','):
+            hours, remainder = divmod(self.video_seconds(video_id), 3600)
+            minutes, seconds = divmod(remainder, 60)
+            items.append({'id': video_id,
+                          'contentDetails': {'duration': f"PT{hours}H{minutes}M{seconds}S"}})
+        return FixtureResponse(200, {'items': items})
+
+    def channel_details(self, params):
+        # Every channel exists; its uploads playlist is "UU" + the channel's suffix
+        channel_id = params.get('id') or f"UC{zlib.crc32(params['forHandle'].encode()):022x}"
+        return FixtureResponse(200, {'items': [{
+            'id': channel_id,
+            'contentDetails': {'relatedPlaylists': {'uploads': f"UU{channel_id[2:]}"}},
+        }]})
+
+    def close(self):
+        pass
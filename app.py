@@ -1,32 +1,33 @@
 import customtkinter as ctk
 from tkinter import messagebox
-import requests
-import re
-from datetime import timedelta
-import threading
+from importlib.util import find_spec
+import os
 import time
 
-# Optional imports for enhanced features
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+from instrumentation import Metrics
+from playlist_core import (
+    PlaylistCalculator, JobManager, CalculationCancelled, DEFAULT_SPEEDS, DURATION_WORKERS,
+    HTTP_POOL_SIZE, HTTP_TIMEOUT, format_time, parse_speed_set, parse_speed_overrides,
+    cumulative_speed_matrix,
+)
 
-try:
-    import numpy as np
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    import matplotlib.pyplot as plt
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+# Minimum delay between progress redraws while a calculation runs
+PROGRESS_INTERVAL_MS = 100
 
-try:
-    from ttkbootstrap import Style
-    TTKBOOTSTRAP_AVAILABLE = True
-except ImportError:
-    TTKBOOTSTRAP_AVAILABLE = False
+# If set, timings are recorded and written to this directory on exit
+# (trace.json for chrome://tracing, metrics.prom in Prometheus format)
+TRACE_DIR_ENV = "YT_CALC_TRACE_DIR"
+
+# Bar colours; longer speed sets are interpolated across this palette
+CHART_COLORS = ['#ef4444', '#f97316', '#eab308', '#22c55e', '#3b82f6']
+# Above this many speeds the chart drops per-bar value labels
+CHART_LABEL_LIMIT = 10
+
+# Optional packages for enhanced features. Only their availability is
+# checked here; they are imported on first use to keep startup fast.
+PIL_AVAILABLE = find_spec("PIL") is not None
+MATPLOTLIB_AVAILABLE = find_spec("matplotlib") is not None and find_spec("numpy") is not None
+TTKBOOTSTRAP_AVAILABLE = find_spec("ttkbootstrap") is not None
 
 # Set appearance mode and color theme
 ctk.set_appearance_mode("dark")  # Modes: "System" (standard), "Dark", "Light"
@@ -39,46 +40,111 @@ class AnimatedProgressBar(ctk.CTkFrame):
         self.canvas = ctk.CTkCanvas(self, height=8)
         self.canvas.pack(fill="x", padx=20, pady=10)
         
+        self.status_label = ctk.CTkLabel(self, text="", font=ctk.CTkFont(size=12),
+                                         text_color="#64748b")
+        self.status_label.pack(pady=(0, 5))
+        self.status_text = ""
+        
+        # Canvas items are created once and only moved with coords()
+        self.bar_item = self.canvas.create_rectangle(0, 0, 0, 0, fill="#3b82f6", outline="")
+        self.glow_item = self.canvas.create_rectangle(0, 0, 0, 0, fill="#60a5fa", outline="")
+        
+        # Width comes from <Configure> instead of winfo_width() every frame
+        self.width = 0
+        self.canvas.bind("<Configure>", self.on_configure)
+        
+        # Don't animate while the bar isn't on screen
+        self.is_mapped = False
+        self.bind("<Map>", self.on_map)
+        self.bind("<Unmap>", self.on_unmap)
+        
         self.progress = 0
+        self.fraction = None  # None while the amount of work is unknown
         self.animation_id = None
         self.is_running = False
         
+    def on_configure(self, event):
+        self.width = event.width
+        self.redraw()
+        
+    def on_map(self, event):
+        self.is_mapped = True
+        if self.is_running:
+            self.schedule()
+        
+    def on_unmap(self, event):
+        self.is_mapped = False
+        self.cancel_animation()
+        
     def start(self):
         self.is_running = True
-        self.animate()
+        self.schedule()
         
     def stop(self):
         self.is_running = False
-        if self.animation_id:
+        self.cancel_animation()
+        self.fraction = None
+        self.hide_items()
+        self.set_status("")
+        
+    def set_progress(self, fraction, text=""):
+        """Switch to a determinate bar showing fraction (0..1) of the work"""
+        self.fraction = max(0.0, min(1.0, fraction))
+        self.set_status(text)
+        
+        # A determinate bar only changes when progress does
+        self.cancel_animation()
+        self.redraw()
+        
+    def set_status(self, text):
+        if text != self.status_text:
+            self.status_text = text
+            self.status_label.configure(text=text)
+        
+    def schedule(self):
+        if self.animation_id is None and self.is_mapped and self.fraction is None:
+            self.animation_id = self.after(80, self.animate)
+        
+    def cancel_animation(self):
+        if self.animation_id is not None:
             self.after_cancel(self.animation_id)
-        self.canvas.delete("all")
+            self.animation_id = None
+        
+    def hide_items(self):
+        self.canvas.coords(self.bar_item, 0, 0, 0, 0)
+        self.canvas.coords(self.glow_item, 0, 0, 0, 0)
+        
+    def redraw(self):
+        width = self.width
+        if not self.is_running or width <= 1:
+            return
+        
+        if self.fraction is not None:
+            # Real progress is known: fill up to it
+            self.canvas.coords(self.bar_item, 0, 2, int(width * self.fraction), 6)
+            self.canvas.coords(self.glow_item, 0, 0, 0, 0)
+            return
+        
+        # Create moving progress bar effect
+        bar_width = int(width * 0.3)
+        start_x = self.progress % width
+        self.canvas.coords(self.bar_item, start_x, 2, start_x + bar_width, 6)
+        
+        # Add glow effect
+        if start_x + bar_width < width:
+            self.canvas.coords(self.glow_item, start_x + bar_width, 2,
+                               start_x + bar_width + 20, 6)
+        else:
+            self.canvas.coords(self.glow_item, 0, 0, 0, 0)
         
     def animate(self):
+        self.animation_id = None
         if not self.is_running:
             return
-            
-        self.canvas.delete("all")
-        width = self.canvas.winfo_width()
-        if width > 1:
-            # Create moving progress bar effect
-            bar_width = int(width * 0.3)
-            start_x = self.progress % width
-            
-            # Draw main progress bar
-            self.canvas.create_rectangle(
-                start_x, 2, start_x + bar_width, 6,
-                fill="#3b82f6", outline=""
-            )
-            
-            # Add glow effect
-            if start_x + bar_width < width:
-                self.canvas.create_rectangle(
-                    start_x + bar_width, 2, start_x + bar_width + 20, 6,
-                    fill="#60a5fa", outline=""
-                )
-        
-        self.progress = (self.progress + 8) % (self.canvas.winfo_width() if self.canvas.winfo_width() > 1 else 300)
-        self.animation_id = self.after(80, self.animate)
+        
+        self.redraw()
+        self.progress = (self.progress + 8) % (self.width if self.width > 1 else 300)
+        self.schedule()
 
 class StatsCard(ctk.CTkFrame):
     def __init__(self, master, title, value, icon="📊", color="#1f538d", **kwargs):
@@ -113,26 +179,204 @@ class SpeedCard(ctk.CTkFrame):
         speed_frame.pack(fill="x", padx=15, pady=(15, 10))
         speed_frame.pack_propagate(False)
         
-        speed_label = ctk.CTkLabel(speed_frame, text=f"{speed}x", 
-                                  font=ctk.CTkFont(size=16, weight="bold"))
-        speed_label.pack(expand=True)
+        self.speed_label = ctk.CTkLabel(speed_frame, text=f"{speed}x", 
+                                       font=ctk.CTkFont(size=16, weight="bold"))
+        self.speed_label.pack(expand=True)
         
         # Time
-        time_label = ctk.CTkLabel(self, text=time_text, 
-                                 font=ctk.CTkFont(size=18, weight="bold"))
-        time_label.pack(pady=(0, 5))
+        self.time_label = ctk.CTkLabel(self, text=time_text, 
+                                      font=ctk.CTkFont(size=18, weight="bold"))
+        self.time_label.pack(pady=(0, 5))
+        
+        # Saved time (empty for 1x)
+        self.saved_label = ctk.CTkLabel(self, text=saved_text, 
+                                       font=ctk.CTkFont(size=12),
+                                       text_color="#4ade80")
+        self.saved_label.pack(pady=(0, 15))
+        
+    def update_values(self, speed, time_text, saved_text=""):
+        self.speed_label.configure(text=f"{speed}x")
+        self.time_label.configure(text=time_text)
+        self.saved_label.configure(text=saved_text)
+
+class VideoTable(ctk.CTkFrame):
+    """Sortable, filterable per-video table with virtualized rows
+    
+    Only `visible_rows` rows of label widgets ever exist; scrolling,
+    sorting and filtering just change which slice of the data they show,
+    so 10,000-video playlists cost the same as 10-video ones.
+    """
+    def __init__(self, master, visible_rows=12, **kwargs):
+        super().__init__(master, corner_radius=12, **kwargs)
+        self.visible_rows = visible_rows
+        
+        self.rows = []  # (index, title, seconds, cumulative seconds per speed) in playlist order
+        self.view = []  # rows after filtering and sorting
+        self.speeds = []
+        self.first = 0
+        self.sort_column = 0
+        self.sort_reverse = False
+        self.filter_after_id = None
+        
+        # Filter and row count
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.pack(fill="x", padx=15, pady=(15, 10))
+        
+        self.filter_var = ctk.StringVar()
+        self.filter_var.trace_add("write", self.on_filter_changed)
+        filter_entry = ctk.CTkEntry(toolbar, textvariable=self.filter_var,
+                                    placeholder_text="Filter videos by title...",
+                                    height=35, font=ctk.CTkFont(size=13))
+        filter_entry.pack(side="left", fill="x", expand=True)
+        
+        self.count_label = ctk.CTkLabel(toolbar, text="", font=ctk.CTkFont(size=12),
+                                        text_color="#64748b")
+        self.count_label.pack(side="left", padx=(15, 0))
+        
+        # Header buttons and the fixed pool of row labels
+        self.grid_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.grid_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
+        self.grid_frame.grid_columnconfigure(1, weight=1)
+        
+        self.scrollbar = ctk.CTkScrollbar(self.grid_frame, command=self.on_scrollbar)
+        self.header_buttons = []
+        self.cells = []
+        
+        self.grid_frame.bind("<MouseWheel>", self.on_mousewheel)
+        self.grid_frame.bind("<Button-4>", self.on_mousewheel)
+        self.grid_frame.bind("<Button-5>", self.on_mousewheel)
+        
+    def set_data(self, videos, speeds):
+        """Show a new list of result videos ({'index', 'title', 'seconds'[, 'speed']})"""
+        # Running totals for every speed at once; overridden videos keep their own speed
+        overrides = [video.get('speed', 0) for video in videos]
+        cumulative = cumulative_speed_matrix([video['seconds'] for video in videos], speeds,
+                                             overrides if any(overrides) else None)
+        if hasattr(cumulative, 'tolist'):
+            cumulative = cumulative.tolist()
+        
+        self.rows = [
+            (video['index'], video['title'] or video['id'], video['seconds'], running)
+            for video, running in zip(videos, cumulative)
+        ]
+        
+        if list(speeds) != self.speeds or not self.cells:
+            self.speeds = list(speeds)
+            self.build_columns()
+        self.apply_view()
         
-        # Saved time
-        if saved_text:
-            saved_label = ctk.CTkLabel(self, text=saved_text, 
+    def build_columns(self):
+        """(Re)create the header and the row widget pool for the current speeds"""
+        for widget in self.header_buttons + [label for row in self.cells for label in row]:
+            widget.destroy()
+        
+        headers = ["#", "Title", "Duration"] + [f"Σ {speed}x" for speed in self.speeds]
+        self.header_buttons = []
+        for col, text in enumerate(headers):
+            button = ctk.CTkButton(self.grid_frame, text=text, height=28,
+                                   width=60 if col == 0 else 90,
+                                   font=ctk.CTkFont(size=12, weight="bold"),
+                                   fg_color="#1e293b", hover_color="#334155",
+                                   command=lambda col=col: self.sort_by(col))
+            button.grid(row=0, column=col, sticky="ew", padx=1, pady=(0, 4))
+            self.header_buttons.append(button)
+        
+        self.cells = []
+        for r in range(self.visible_rows):
+            row = []
+            for col in range(len(headers)):
+                label = ctk.CTkLabel(self.grid_frame, text="", height=24,
                                      font=ctk.CTkFont(size=12),
-                                     text_color="#4ade80")
-            saved_label.pack(pady=(0, 15))
+                                     anchor="w" if col == 1 else "e")
+                label.grid(row=r + 1, column=col, sticky="ew", padx=6)
+                label.bind("<MouseWheel>", self.on_mousewheel)
+                label.bind("<Button-4>", self.on_mousewheel)
+                label.bind("<Button-5>", self.on_mousewheel)
+                row.append(label)
+            self.cells.append(row)
+        
+        self.scrollbar.grid(row=1, column=len(headers), rowspan=self.visible_rows, sticky="ns")
+        
+    def on_filter_changed(self, *args):
+        # Debounce typing so large tables aren't refiltered on every key
+        if self.filter_after_id is not None:
+            self.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.after(150, self.apply_view)
+        
+    def sort_by(self, column):
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.apply_view()
+        
+    def apply_view(self):
+        """Recompute the filtered, sorted view and show its first rows"""
+        self.filter_after_id = None
+        text = self.filter_var.get().strip().casefold()
+        view = [row for row in self.rows if text in row[1].casefold()] if text else list(self.rows)
+        
+        # Cumulative columns follow playlist order, so they sort like "#"
+        if self.sort_column == 1:
+            view.sort(key=lambda row: row[1].casefold(), reverse=self.sort_reverse)
+        elif self.sort_column == 2:
+            view.sort(key=lambda row: row[2], reverse=self.sort_reverse)
+        elif self.sort_reverse:
+            view.reverse()
+        
+        self.view = view
+        self.first = 0
+        self.render()
+        
+    def scroll_to(self, first):
+        first = max(0, min(first, len(self.view) - self.visible_rows))
+        if first != self.first:
+            self.first = first
+            self.render()
+        
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.view)))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.first + int(amount) * step)
+        
+    def on_mousewheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.first - 3)
         else:
-            ctk.CTkLabel(self, text="").pack(pady=(0, 15))
+            self.scroll_to(self.first + 3)
+        return "break"
+        
+    def render(self):
+        """Write the visible slice of the view into the row widget pool"""
+        for r, labels in enumerate(self.cells):
+            i = self.first + r
+            if i < len(self.view):
+                index, title, seconds, cumulative = self.view[i]
+                if len(title) > 70:
+                    title = title[:67] + "..."
+                values = [str(index), title, format_time(seconds)]
+                values += [format_time(value) for value in cumulative]
+            else:
+                values = [""] * len(labels)
+            
+            for label, value in zip(labels, values):
+                label.configure(text=value)
+        
+        total = len(self.view)
+        if total:
+            last = min(total, self.first + self.visible_rows)
+            self.scrollbar.set(self.first / total, last / total)
+            self.count_label.configure(text=f"{self.first + 1:,}–{last:,} of {total:,} videos")
+        else:
+            self.scrollbar.set(0, 1)
+            self.count_label.configure(text="No matching videos")
 
 class YouTubePlaylistCalculator:
-    def __init__(self):
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT,
+                 max_workers=DURATION_WORKERS, include_titles=True, trace_dir=None):
         self.app = ctk.CTk()
         self.app.geometry("1200x800")
         self.app.title("YouTube Playlist Time Calculator")
@@ -141,9 +385,24 @@ class YouTubePlaylistCalculator:
         self.center_window()
         
         # Variables
-        self.api_key = ""
         self.results_data = None
         
+        # Latest progress event from the worker, drawn at most every PROGRESS_INTERVAL_MS
+        self.progress_event = None
+        self.progress_pending = False
+        
+        # Headless fetch/compute core with one shared HTTP client
+        self.trace_dir = trace_dir
+        self.calculator = PlaylistCalculator(pool_size=pool_size, timeout=timeout,
+                                             max_workers=max_workers,
+                                             include_titles=include_titles,
+                                             metrics=Metrics() if trace_dir else None)
+        self.metrics = self.calculator.metrics
+        
+        # One running job at a time; identical requests share it
+        self.jobs = JobManager(self.calculator)
+        self.current_job = None
+        
         # Create UI
         self.setup_ui()
         
@@ -151,6 +410,14 @@ class YouTubePlaylistCalculator:
         self.fade_in_progress = 0
         self.typing_animation_active = False
         
+        # Don't leave requests running behind a closed window or an edited URL
+        self.app.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.url_var.trace_add("write", lambda *args: self.cancel_calculation())
+        
+        # Re-slice an already fetched playlist as the range or speeds are edited
+        for var in (self.start_var, self.end_var, self.speeds_var, self.overrides_var):
+            var.trace_add("write", lambda *args: self.on_range_changed())
+        
     def center_window(self):
         self.app.update_idletasks()
         width = 1200
@@ -285,6 +552,31 @@ class YouTubePlaylistCalculator:
                                  text_color="#64748b")
         range_info.pack(pady=(0, 15))
         
+        # Playback speed set and per-video overrides
+        speed_section = ctk.CTkFrame(input_frame, corner_radius=12)
+        speed_section.pack(fill="x", padx=20, pady=(0, 20))
+        
+        speed_header = ctk.CTkLabel(speed_section, text="⚡ Playback Speeds", 
+                                   font=ctk.CTkFont(size=18, weight="bold"))
+        speed_header.pack(pady=(15, 10))
+        
+        self.speeds_var = ctk.StringVar(value=", ".join(f"{speed:g}" for speed in DEFAULT_SPEEDS))
+        speeds_entry = ctk.CTkEntry(speed_section, textvariable=self.speeds_var,
+                                  height=35, font=ctk.CTkFont(size=14))
+        speeds_entry.pack(fill="x", padx=20, pady=(0, 10))
+        
+        self.overrides_var = ctk.StringVar()
+        overrides_entry = ctk.CTkEntry(speed_section, textvariable=self.overrides_var,
+                                     placeholder_text="Per-video speeds (optional), e.g. VIDEO_ID=1, OTHER_ID=1.5",
+                                     height=35, font=ctk.CTkFont(size=14))
+        overrides_entry.pack(fill="x", padx=20, pady=(0, 10))
+        
+        speed_info = ctk.CTkLabel(speed_section, 
+                                 text="💡 List speeds (1, 1.5, 2) or give ranges like 0.25-4:0.25",
+                                 font=ctk.CTkFont(size=12),
+                                 text_color="#64748b")
+        speed_info.pack(pady=(0, 15))
+        
         # Calculate button with modern styling
         button_frame = ctk.CTkFrame(input_frame, fg_color="transparent")
         button_frame.pack(fill="x", padx=20, pady=(0, 20))
@@ -299,7 +591,20 @@ class YouTubePlaylistCalculator:
             fg_color="#10b981",
             hover_color="#059669"
         )
-        self.calculate_btn.pack(expand=True, fill="x")
+        self.calculate_btn.pack(side="left", expand=True, fill="x")
+        
+        # Shown only while a calculation runs
+        self.cancel_btn = ctk.CTkButton(
+            button_frame,
+            text="✖ Cancel",
+            command=self.cancel_calculation,
+            height=50,
+            width=140,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            corner_radius=25,
+            fg_color="#ef4444",
+            hover_color="#dc2626"
+        )
         
         # Animated progress bar
         self.progress_bar = AnimatedProgressBar(input_frame)
@@ -328,6 +633,8 @@ class YouTubePlaylistCalculator:
         # Speed cards container
         self.speeds_frame = ctk.CTkFrame(self.results_section, fg_color="transparent")
         self.speeds_frame.pack(fill="x", padx=20, pady=(0, 20))
+        self.speed_cards = []
+        self.speed_rows = []
         
         # Chart section
         chart_header = ctk.CTkLabel(self.results_section, 
@@ -339,29 +646,50 @@ class YouTubePlaylistCalculator:
         self.chart_frame.pack(fill="x", padx=20, pady=(0, 20))
         self.chart_frame.pack_propagate(False)
         
+        # Built on first use, then updated in place for every result
+        self.chart_figure = None
+        self.chart_canvas = None
+        self.chart_ax = None
+        self.chart_bars = []
+        self.chart_value_labels = []
+        self.chart_label = None
+        
+        # Per-video table
+        table_header = ctk.CTkLabel(self.results_section, 
+                                   text="📋 Per-Video Breakdown",
+                                   font=ctk.CTkFont(size=20, weight="bold"))
+        table_header.pack(pady=(20, 15))
+        
+        self.video_table = VideoTable(self.results_section)
+        self.video_table.pack(fill="x", padx=20, pady=(0, 20))
+        
     def create_speed_cards(self, speeds_data):
-        # Clear existing cards
-        for widget in self.speeds_frame.winfo_children():
-            widget.destroy()
+        # Drop cards (and emptied rows) that the new data doesn't need
+        while len(self.speed_cards) > len(speeds_data):
+            self.speed_cards.pop().destroy()
+        while len(self.speed_rows) > (len(speeds_data) + 2) // 3:
+            self.speed_rows.pop().destroy()
             
-        # Create grid layout for speed cards
+        # Update existing cards in place; only create the missing ones
         for i, (speed, time_str, saved_str) in enumerate(speeds_data):
+            if i < len(self.speed_cards):
+                self.speed_cards[i].update_values(speed, time_str, saved_str)
+                continue
+            
             row = i // 3
             col = i % 3
             
             if col == 0:
                 row_frame = ctk.CTkFrame(self.speeds_frame, fg_color="transparent")
                 row_frame.pack(fill="x", pady=(0, 10))
+                self.speed_rows.append(row_frame)
             
-            card = SpeedCard(row_frame, speed, time_str, saved_str)
+            card = SpeedCard(self.speed_rows[row], speed, time_str, saved_str)
             card.pack(side="left", fill="x", expand=True, 
                      padx=(0, 10) if col < 2 else (0, 0))
+            self.speed_cards.append(card)
             
     def create_chart(self, speeds, times):
-        # Clear existing chart
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-            
         if not MATPLOTLIB_AVAILABLE:
             # Create a simple text-based chart if matplotlib is not available
             chart_text = "📊 Time Comparison Chart\n\n"
@@ -372,50 +700,97 @@ class YouTubePlaylistCalculator:
                 bar = "█" * bar_length + "░" * (30 - bar_length)
                 chart_text += f"{speed}x: {bar} {time_val:.1f}h\n"
             
-            chart_label = ctk.CTkLabel(self.chart_frame, 
-                                      text=chart_text,
-                                      font=ctk.CTkFont(size=12, family="Courier"),
-                                      justify="left")
-            chart_label.pack(expand=True, pady=20)
+            if self.chart_label is None:
+                self.chart_label = ctk.CTkLabel(self.chart_frame, 
+                                               font=ctk.CTkFont(size=12, family="Courier"),
+                                               justify="left")
+                self.chart_label.pack(expand=True, pady=20)
+            self.chart_label.configure(text=chart_text)
             return
             
         try:
-            # Create matplotlib figure
-            fig = Figure(figsize=(10, 4), facecolor='#212121')
-            ax = fig.add_subplot(111, facecolor='#212121')
-            
-            # Create bars with nice colors
-            colors = ['#ef4444', '#f97316', '#eab308', '#22c55e', '#3b82f6']
-            bars = ax.bar([f'{s}x' for s in speeds], times, color=colors, alpha=0.8)
-            
-            # Customize chart appearance
-            ax.set_xlabel('Playback Speed', fontsize=12, color='white')
-            ax.set_ylabel('Time (hours)', fontsize=12, color='white')
-            ax.set_title('Viewing Time at Different Speeds', fontsize=14, fontweight='bold', color='white')
-            ax.tick_params(colors='white')
-            ax.spines['bottom'].set_color('white')
-            ax.spines['top'].set_color('white') 
-            ax.spines['right'].set_color('white')
-            ax.spines['left'].set_color('white')
-            
-            # Add value labels on bars
-            for bar, time_val in zip(bars, times):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + max(times) * 0.02,
-                       f'{time_val:.1f}h', ha='center', va='bottom', color='white', fontsize=10)
-            
-            # Embed chart
-            canvas = FigureCanvasTkAgg(fig, self.chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+            if self.chart_figure is None:
+                self.build_chart()
+            self.update_chart(speeds, times)
             
         except Exception as e:
-            # Fallback if matplotlib fails
+            # Fallback if matplotlib fails; the next result rebuilds the chart
+            for widget in self.chart_frame.winfo_children():
+                widget.destroy()
+            self.chart_figure = None
+            self.chart_canvas = None
+            self.chart_bars = []
+            self.chart_value_labels = []
             error_label = ctk.CTkLabel(self.chart_frame, 
                                       text=f"📊 Chart visualization temporarily unavailable\n{str(e)[:50]}...",
                                       font=ctk.CTkFont(size=14))
             error_label.pack(expand=True)
         
+    def build_chart(self):
+        """Create the figure, axes and Tk canvas once"""
+        # Deferred so matplotlib only loads when a chart is drawn
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        # Create matplotlib figure
+        fig = Figure(figsize=(10, 4), facecolor='#212121')
+        ax = fig.add_subplot(111, facecolor='#212121')
+        
+        # Customize chart appearance
+        ax.set_xlabel('Playback Speed', fontsize=12, color='white')
+        ax.set_ylabel('Time (hours)', fontsize=12, color='white')
+        ax.set_title('Viewing Time at Different Speeds', fontsize=14, fontweight='bold', color='white')
+        ax.tick_params(colors='white')
+        ax.spines['bottom'].set_color('white')
+        ax.spines['top'].set_color('white') 
+        ax.spines['right'].set_color('white')
+        ax.spines['left'].set_color('white')
+        
+        # Embed chart
+        canvas = FigureCanvasTkAgg(fig, self.chart_frame)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.chart_figure = fig
+        self.chart_ax = ax
+        self.chart_canvas = canvas
+        
+    def update_chart(self, speeds, times):
+        """Update bar heights and labels in place and schedule a redraw"""
+        ax = self.chart_ax
+        max_time = max(times)
+        
+        # Bars are only recreated when the number of speeds changes
+        if len(self.chart_bars) != len(speeds):
+            for artist in self.chart_bars + self.chart_value_labels:
+                artist.remove()
+            
+            # Create bars with nice colors
+            if len(speeds) <= len(CHART_COLORS):
+                colors = CHART_COLORS[:len(speeds)]
+            else:
+                from matplotlib.colors import LinearSegmentedColormap
+                cmap = LinearSegmentedColormap.from_list("speeds", CHART_COLORS)
+                colors = [cmap(i / (len(speeds) - 1)) for i in range(len(speeds))]
+            self.chart_bars = list(ax.bar(range(len(speeds)), times, color=colors, alpha=0.8))
+            self.chart_value_labels = [
+                ax.text(0, 0, "", ha='center', va='bottom', color='white', fontsize=10)
+                for _ in speeds
+            ]
+            ax.set_xticks(range(len(speeds)))
+        
+        ax.set_xticklabels([f'{s:g}x' for s in speeds],
+                           rotation=45 if len(speeds) > CHART_LABEL_LIMIT else 0)
+        
+        # Add value labels on bars (skipped for long speed curves)
+        show_labels = len(speeds) <= CHART_LABEL_LIMIT
+        for bar, label, time_val in zip(self.chart_bars, self.chart_value_labels, times):
+            bar.set_height(time_val)
+            label.set_position((bar.get_x() + bar.get_width()/2., time_val + max_time * 0.02))
+            label.set_text(f'{time_val:.1f}h' if show_labels else "")
+        
+        ax.set_ylim(0, max_time * 1.15 if max_time > 0 else 1)
+        self.chart_canvas.draw_idle()
+        
     def animate_results_appearance(self):
         """Animate the appearance of results section"""
         self.results_section.pack(fill="x", pady=(20, 0))
@@ -428,116 +803,6 @@ class YouTubePlaylistCalculator:
                 
         fade_in()
         
-    def extract_playlist_id(self, url):
-        """Extract playlist ID from YouTube URL"""
-        patterns = [
-            r'[?&]list=([a-zA-Z0-9_-]+)',
-            r'playlist\?list=([a-zA-Z0-9_-]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
-    
-    def get_playlist_videos(self, playlist_id):
-        """Get all videos from a playlist"""
-        videos = []
-        next_page_token = None
-        
-        while True:
-            url = f'https://www.googleapis.com/youtube/v3/playlistItems'
-            params = {
-                'part': 'snippet',
-                'playlistId': playlist_id,
-                'maxResults': 50,
-                'key': self.api_key_var.get()
-            }
-            
-            if next_page_token:
-                params['pageToken'] = next_page_token
-            
-            response = requests.get(url, params=params)
-            
-            if response.status_code != 200:
-                raise Exception(f"API Error: {response.status_code} - {response.text}")
-            
-            data = response.json()
-            
-            for item in data['items']:
-                video_id = item['snippet']['resourceId']['videoId']
-                title = item['snippet']['title']
-                videos.append({'id': video_id, 'title': title})
-            
-            next_page_token = data.get('nextPageToken')
-            if not next_page_token:
-                break
-                
-        return videos
-    
-    def get_video_durations(self, video_ids):
-        """Get durations for multiple videos"""
-        durations = {}
-        
-        # Process in batches of 50 (API limit)
-        for i in range(0, len(video_ids), 50):
-            batch = video_ids[i:i+50]
-            url = 'https://www.googleapis.com/youtube/v3/videos'
-            params = {
-                'part': 'contentDetails',
-                'id': ','.join(batch),
-                'key': self.api_key_var.get()
-            }
-            
-            response = requests.get(url, params=params)
-            
-            if response.status_code != 200:
-                raise Exception(f"API Error: {response.status_code}")
-            
-            data = response.json()
-            
-            for item in data['items']:
-                video_id = item['id']
-                duration = item['contentDetails']['duration']
-                durations[video_id] = self.parse_duration(duration)
-        
-        return durations
-    
-    def parse_duration(self, duration):
-        """Parse ISO 8601 duration to seconds"""
-        duration = duration[2:]
-        
-        hours = 0
-        minutes = 0
-        seconds = 0
-        
-        if 'H' in duration:
-            hours = int(duration.split('H')[0])
-            duration = duration.split('H')[1]
-        
-        if 'M' in duration:
-            minutes = int(duration.split('M')[0])
-            duration = duration.split('M')[1]
-        
-        if 'S' in duration:
-            seconds = int(duration.split('S')[0])
-        
-        return hours * 3600 + minutes * 60 + seconds
-    
-    def format_time(self, seconds):
-        """Format seconds to readable time"""
-        td = timedelta(seconds=int(seconds))
-        hours, remainder = divmod(td.seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        
-        if td.days > 0:
-            return f"{td.days}d {hours}h {minutes}m"
-        elif hours > 0:
-            return f"{hours}h {minutes}m"
-        else:
-            return f"{minutes}m {seconds}s"
-    
     def calculate_playlist_time(self):
         """Main function to calculate playlist time"""
         # Validate inputs
@@ -549,98 +814,185 @@ class YouTubePlaylistCalculator:
             messagebox.showerror("Error", "Please enter a YouTube playlist URL")
             return
         
-        # Start calculation in separate thread
-        thread = threading.Thread(target=self._calculate_thread)
-        thread.daemon = True
-        thread.start()
+        try:
+            start = int(self.start_var.get() or 1)
+            end = int(self.end_var.get()) if self.end_var.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Error", "Video range must be whole numbers")
+            return
+        
+        try:
+            speeds, overrides = self.read_speed_settings()
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        # Always fetch, so videos added since the last fetch are picked up; the
+        # prefix-sum index only backs live range edits (on_range_changed).
+        # Start (or join) a background job; a different request cancels the old one
+        self.calculator.api_key = self.api_key_var.get().strip()
+        job = self.jobs.submit(
+            self.url_var.get(), start, end, speeds,
+            on_done=lambda job: self.app.after(0, lambda: self.on_job_done(job)),
+            progress=self.on_progress, overrides=overrides
+        )
+        if job is self.current_job:
+            return
+        
+        self.current_job = job
+        self.start_progress()
+    
+    def read_speed_settings(self):
+        """The speed set and per-video overrides entered by the user"""
+        speeds = parse_speed_set(self.speeds_var.get())
+        overrides = parse_speed_overrides(self.overrides_var.get())
+        return speeds, overrides
+    
+    def cancel_calculation(self):
+        """Cancel the running calculation, if any"""
+        if self.current_job is None:
+            return
+        self.jobs.cancel_all()
+        self.current_job = None
+        self.stop_progress()
+    
+    def on_close(self):
+        self.jobs.cancel_all()
+        self.app.destroy()
+    
+    def start_progress(self):
+        self.progress_event = None
+        self.progress_bar.stop()
+        self.progress_bar.pack(fill="x", padx=20, pady=(10, 20))
+        self.progress_bar.start()
+        self.calculate_btn.configure(text="🔄 Calculating...")
+        self.cancel_btn.pack(side="left", padx=(10, 0))
     
-    def _calculate_thread(self):
-        """Thread function for calculation"""
+    def stop_progress(self):
+        # Stop progress and reset buttons
+        self.progress_bar.stop()
+        self.progress_bar.pack_forget()
+        self.cancel_btn.pack_forget()
+        self.calculate_btn.configure(text="🚀 Calculate Playlist Time")
+    
+    def on_job_done(self, job):
+        """Show the results of a finished job (runs on the Tk thread)"""
+        if job is not self.current_job:
+            return
+        self.current_job = None
+        self.stop_progress()
+        
+        if isinstance(job.error, CalculationCancelled):
+            return
+        if job.error is not None:
+            messagebox.showerror("Error", str(job.error))
+            return
+        
+        self.show_result(job.result)
+    
+    def on_range_changed(self):
+        """Update the results live when the range stays inside fetched data"""
+        if self.current_job is not None:
+            return
         try:
-            # Start progress animation
-            self.app.after(0, lambda: self.progress_bar.pack(fill="x", padx=20, pady=(10, 20)))
-            self.app.after(0, lambda: self.progress_bar.start())
-            self.app.after(0, lambda: self.calculate_btn.configure(state='disabled', text="🔄 Calculating..."))
-            
-            # Extract playlist ID
-            playlist_id = self.extract_playlist_id(self.url_var.get())
-            if not playlist_id:
-                raise Exception("Invalid playlist URL format")
-            
-            # Get playlist videos
-            videos = self.get_playlist_videos(playlist_id)
-            total_videos = len(videos)
-            
-            if total_videos == 0:
-                raise Exception("No videos found or playlist is private")
-            
-            # Apply range filtering
-            start_idx = max(1, int(self.start_var.get() or 1)) - 1
-            end_idx = len(videos)
-            
-            if self.end_var.get().strip():
-                end_idx = min(int(self.end_var.get()), len(videos))
-            
-            selected_videos = videos[start_idx:end_idx]
-            
-            # Get video durations
-            video_ids = [video['id'] for video in selected_videos]
-            durations = self.get_video_durations(video_ids)
-            
-            # Calculate total time
-            total_seconds = sum(durations.get(video['id'], 0) for video in selected_videos)
-            
-            if total_seconds == 0:
-                raise Exception("No valid video durations found")
-            
-            # Calculate speeds data
-            speeds = [1.0, 1.25, 1.5, 1.75, 2.0]
-            speeds_data = []
-            chart_times = []
-            
-            for speed in speeds:
-                time_at_speed = total_seconds / speed
-                chart_times.append(time_at_speed / 3600)  # Convert to hours for chart
-                
-                if speed == 1.0:
-                    speeds_data.append((speed, self.format_time(time_at_speed), ""))
-                else:
-                    time_saved = total_seconds - time_at_speed
-                    speeds_data.append((speed, self.format_time(time_at_speed), 
-                                     f"Saves {self.format_time(time_saved)}"))
-            
-            # Update UI with results
-            self.app.after(0, lambda: self.update_results_ui(
-                total_videos, start_idx + 1, end_idx, total_seconds, speeds_data, chart_times, speeds
-            ))
+            start = int(self.start_var.get() or 1)
+            end = int(self.end_var.get()) if self.end_var.get().strip() else None
+            speeds, overrides = self.read_speed_settings()
+        except Exception:
+            return
+        
+        result = self.calculator.range_summary(self.url_var.get(), start, end, speeds, overrides)
+        if result is not None:
+            self.show_result(result)
+    
+    def show_result(self, result):
+        """Fill the cards, chart and table from a calculation result"""
+        with self.metrics.span('ui_result'):
+            self.draw_result(result)
+    
+    def draw_result(self, result):
+        # Calculate speeds data
+        speeds = []
+        speeds_data = []
+        chart_times = []
+        
+        for row in result['speeds']:
+            speed = row['speed']
+            speeds.append(speed)
+            chart_times.append(row['seconds'] / 3600)  # Convert to hours for chart
             
-        except Exception as e:
-            self.app.after(0, lambda: messagebox.showerror("Error", str(e)))
+            if speed == 1.0:
+                speeds_data.append((speed, format_time(row['seconds']), ""))
+            elif row['saved_seconds'] < 0:
+                speeds_data.append((speed, format_time(row['seconds']), 
+                                 f"Adds {format_time(-row['saved_seconds'])}"))
+            else:
+                speeds_data.append((speed, format_time(row['seconds']), 
+                                 f"Saves {format_time(row['saved_seconds'])}"))
+        
+        # Update UI with results
+        self.update_results_ui(
+            result['total_videos'], result['start'], result['end'], result['total_seconds'],
+            speeds_data, chart_times, speeds
+        )
+        self.video_table.set_data(result['videos'], speeds)
+    
+    def on_progress(self, event):
+        """Receive a progress event from a worker thread (throttled redraw)"""
+        self.progress_event = event
+        if not self.progress_pending:
+            self.progress_pending = True
+            self.app.after(PROGRESS_INTERVAL_MS, self.show_progress)
+    
+    def show_progress(self):
+        """Draw the latest progress event and partial totals"""
+        self.progress_pending = False
+        event = self.progress_event
+        if event is None or not self.progress_bar.is_running:
+            return
         
-        finally:
-            # Stop progress and reset button
-            self.app.after(0, lambda: self.progress_bar.stop())
-            self.app.after(0, lambda: self.progress_bar.pack_forget())
-            self.app.after(0, lambda: self.calculate_btn.configure(state='normal', text="🚀 Calculate Playlist Time"))
+        with self.metrics.span('ui_progress'):
+            self.draw_progress(event)
+    
+    def draw_progress(self, event):
+        text = (f"Page {event['pages_fetched']} of {event['pages_total']}  •  "
+                f"{event['ids_resolved']:,} of {event['ids_total']:,} durations")
+        if event['eta'] is not None:
+            text += f"  •  ETA {format_time(event['eta'])}"
+        fraction = event['ids_resolved'] / event['ids_total'] if event['ids_total'] else 0
+        self.progress_bar.set_progress(fraction, text)
+        
+        # Partial totals while the run is still going
+        self.total_videos_card.update_value(str(event['total_videos']))
+        self.duration_card.update_value(format_time(event['total_seconds']))
+        self.results_section.pack(fill="x", pady=(20, 0))
     
     def update_results_ui(self, total_videos, start_idx, end_idx, total_seconds, speeds_data, chart_times, speeds):
         """Update the results UI with calculated data"""
         # Update stats cards
         self.total_videos_card.update_value(str(total_videos))
         self.range_card.update_value(f"{start_idx} to {end_idx}")
-        self.duration_card.update_value(self.format_time(total_seconds))
+        self.duration_card.update_value(format_time(total_seconds))
         
         # Create speed cards
         self.create_speed_cards(speeds_data)
         
         # Create chart
-        self.create_chart(speeds, chart_times)
+        with self.metrics.span('create_chart'):
+            self.create_chart(speeds, chart_times)
         
         # Show results section with animation
         self.animate_results_appearance()
     
     def run(self):
-        self.app.mainloop()
+        try:
+            self.app.mainloop()
+        finally:
+            self.calculator.close()
+            if self.trace_dir:
+                os.makedirs(self.trace_dir, exist_ok=True)
+                self.metrics.write_chrome_trace(os.path.join(self.trace_dir, "trace.json"))
+                self.metrics.write_prometheus(os.path.join(self.trace_dir, "metrics.prom"))
 
 def main():
     """
@@ -701,7 +1053,7 @@ def main():
     print("🔑 Don't forget to get your YouTube Data API v3 key!")
     
     try:
-        app = YouTubePlaylistCalculator()
+        app = YouTubePlaylistCalculator(trace_dir=os.environ.get(TRACE_DIR_ENV))
         app.run()
     except Exception as e:
         print(f"❌ Error starting application: {e}")
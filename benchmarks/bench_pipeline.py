@@ -0,0 +1,195 @@
+"""End-to-end benchmark: playlist fetch, duration lookup and aggregation
+
+Starts a local stub of the YouTube Data API (see stub_api.py) and runs the
+real PlaylistCalculator.calculate() path against it over HTTP for
+playlists of several sizes. Reports throughput (videos/s), request latency
+p50/p99 and peak traced memory per size, and compares the results with a
+JSON baseline so regressions show up in CI.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 100,1000 --latency 0.02 --error-rate 0.01
+    python benchmarks/bench_pipeline.py --save-baseline   # record this machine's baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from api_fixtures import SyntheticTransport
+from instrumentation import Metrics
+from playlist_core import PlaylistCalculator, HTTPTransport, DURATION_WORKERS
+from stub_api import StubAPIServer
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def parse_sizes(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_once(base_url, playlist_id, workers, trace_memory=False):
+    """Calculate one playlist against the stub; return (seconds, metrics, peak bytes)"""
+    metrics = Metrics()
+    calculator = PlaylistCalculator(use_cache=False, include_titles=True, max_workers=workers,
+                                    transport=HTTPTransport(base_url=base_url),
+                                    metrics=metrics)
+
+    # Benchmark the pipeline, not the client-side rate limit
+    calculator.client.scheduler.rate = 1e9
+    calculator.client.scheduler.burst = 1e9
+    calculator.client.scheduler.tokens = 1e9
+    calculator.client.scheduler.backoff_base = 0.01
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = calculator.calculate(playlist_id)
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        calculator.close()
+
+    assert result['end'] == result['total_videos']
+    return elapsed, metrics, peak
+
+
+def bench_size(base_url, size, repeat, workers):
+    playlist_id = f"PLbench{size}"
+    timings = []
+    latencies = []
+    requests_made = 0
+    retries = 0
+
+    for _ in range(repeat):
+        elapsed, metrics, _ = run_once(base_url, playlist_id, workers)
+        timings.append(elapsed)
+        latencies += [event['dur'] / 1e6 for event in metrics.chrome_trace()['traceEvents']
+                      if event.get('cat') == 'yt_request_seconds']
+        requests_made += metrics.counter_total('yt_requests_total')
+        retries += metrics.counter_total('yt_retries_total')
+
+    # Peak memory comes from a separate run: tracemalloc slows everything down
+    _, _, peak = run_once(base_url, playlist_id, workers, trace_memory=True)
+
+    best = min(timings)
+    return {
+        'videos': size,
+        'runs': repeat,
+        'best_seconds': round(best, 4),
+        'median_seconds': round(statistics.median(timings), 4),
+        'videos_per_second': round(size / best, 1),
+        'requests_per_run': requests_made // repeat,
+        'retries_per_run': round(retries / repeat, 2),
+        'request_p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'request_p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'peak_memory_mb': round(peak / 1e6, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing regressions against the baseline (empty if none)"""
+    regressions = []
+    previous = {row['videos']: row for row in baseline.get('results', [])}
+    for row in results:
+        old = previous.get(row['videos'])
+        if old is None:
+            continue
+        if row['videos_per_second'] < old['videos_per_second'] * (1 - tolerance):
+            regressions.append(f"{row['videos']} videos: throughput {row['videos_per_second']}/s "
+                               f"vs baseline {old['videos_per_second']}/s")
+        if row['peak_memory_mb'] > old['peak_memory_mb'] * (1 + tolerance):
+            regressions.append(f"{row['videos']} videos: peak memory {row['peak_memory_mb']} MB "
+                               f"vs baseline {old['peak_memory_mb']} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES,
+                        help="comma separated playlist sizes (default: 100,1000,10000,50000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size")
+    parser.add_argument("--workers", type=int, default=DURATION_WORKERS,
+                        help="concurrent duration lookups")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="stub extra random seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of stub requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write the results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown before a regression is reported (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    transport = SyntheticTransport(playlists={f"PLbench{size}": size for size in args.sizes},
+                                   latency=args.latency, jitter=args.jitter,
+                                   error_rate=args.error_rate, seed=args.seed)
+    server = StubAPIServer(transport)
+    base_url = server.start()
+
+    results = []
+    try:
+        print(f"{'videos':>8} {'best s':>8} {'videos/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'peak MB':>8} {'retries':>8}")
+        for size in args.sizes:
+            row = bench_size(base_url, size, args.repeat, args.workers)
+            results.append(row)
+            print(f"{row['videos']:>8} {row['best_seconds']:>8.3f} {row['videos_per_second']:>10.0f} "
+                  f"{row['request_p50_ms']:>8.2f} {row['request_p99_ms']:>8.2f} "
+                  f"{row['peak_memory_mb']:>8.2f} {row['retries_per_run']:>8}")
+    finally:
+        server.stop()
+
+    report = {
+        'python': sys.version.split()[0],
+        'settings': {'workers': args.workers, 'latency': args.latency, 'jitter': args.jitter,
+                     'error_rate': args.error_rate, 'repeat': args.repeat},
+        'results': results,
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline yet; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    if baseline.get('settings') != report['settings']:
+        print("\nWarning: baseline was recorded with different settings")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Local stand-in for the YouTube Data API used by the benchmarks
+
+Serves /youtube/v3/playlistItems and /youtube/v3/videos over real HTTP on
+localhost, generating responses with api_fixtures.SyntheticTransport, so
+the client's connection pool, gzip and JSON decoding are all exercised.
+
+Usage (standalone):
+    python benchmarks/stub_api.py --port 8765 --videos 5000 --latency 0.05
+
+then point a client at it with
+    PlaylistCalculator(transport=HTTPTransport(base_url="http://127.0.0.1:8765/youtube/v3"))
+"""
+import argparse
+import gzip
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from api_fixtures import SyntheticTransport
+
+API_PREFIX = "/youtube/v3/"
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Answers API GETs from the server's SyntheticTransport"""
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # reply would stall on a delayed ACK and swamp the measurements
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith(API_PREFIX):
+            self.reply(404, b'{"error": {"code": 404, "message": "Not found"}}')
+            return
+
+        endpoint = url.path[len(API_PREFIX):]
+        params = dict(parse_qsl(url.query))
+        headers = {"If-None-Match": self.headers["If-None-Match"]} \
+            if self.headers["If-None-Match"] else None
+
+        try:
+            response = self.server.transport.send(endpoint, params, headers)
+        except requests.ConnectionError:
+            # An injected connection error: drop the connection without a reply
+            self.close_connection = True
+            return
+        self.reply(response.status_code, response.content, response.headers)
+
+    def reply(self, status, body, headers=None):
+        if "gzip" in self.headers.get("Accept-Encoding", "") and body:
+            body = gzip.compress(body, compresslevel=1)
+            encoding = "gzip"
+        else:
+            encoding = None
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubAPIServer(ThreadingHTTPServer):
+    """Threaded HTTP server wrapping a SyntheticTransport"""
+    daemon_threads = True
+
+    def __init__(self, transport, host="127.0.0.1", port=0):
+        super().__init__((host, port), StubAPIHandler)
+        self.transport = transport
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/youtube/v3"
+
+    def start(self):
+        """Serve in a background thread and return the API base URL"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--videos", type=int, default=1000, help="videos per playlist")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 replies")
+    args = parser.parse_args(argv)
+
+    transport = SyntheticTransport(videos=args.videos, latency=args.latency,
+                                   jitter=args.jitter, error_rate=args.error_rate)
+    server = StubAPIServer(transport, port=args.port)
+    print(f"Serving a stub YouTube Data API at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
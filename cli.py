@@ -0,0 +1,260 @@
+"""Command-line entry point for the playlist time calculator
+
+Runs without a display: only the headless core is imported, never Tk or
+matplotlib.
+
+Usage:
+    python cli.py "https://www.youtube.com/playlist?list=..." --api-key KEY
+    python cli.py PLAYLIST_ID --start 5 --end 20 --json
+    python cli.py --batch playlists.txt
+    python cli.py PLAYLIST_ID --speeds 0.5-3:0.25 --override VIDEO_ID=1
+    python cli.py --channel @handle
+
+Several playlists (given on the command line or with --batch, one URL
+per line) are calculated together: videos shared between playlists are
+looked up once and a grand total is printed. --channel totals every upload
+of a channel in constant memory; an interrupted scan resumes on the next
+run.
+
+The API key can also be given through the YOUTUBE_API_KEY environment
+variable. --record DIR saves every API response as a fixture; --replay DIR
+and --synthetic N run entirely offline and need no key. --trace FILE and
+--metrics FILE write timings as a Chrome trace and as Prometheus text.
+"""
+import argparse
+import json
+import os
+import sys
+
+from playlist_core import (
+    PlaylistCalculator, DEFAULT_SPEEDS, DURATION_WORKERS, PLAYLIST_WORKERS, format_time,
+    parse_speed_set, parse_speed_overrides,
+)
+from api_fixtures import RecordingTransport, ReplayTransport, SyntheticTransport
+from instrumentation import Metrics
+
+
+def parse_speeds(text):
+    """Parse a speed set such as '1,1.5,2' or '0.25-4:0.25'"""
+    try:
+        return parse_speed_set(text)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_override(text):
+    """Parse a per-video speed such as 'VIDEO_ID=1'"""
+    try:
+        return parse_speed_overrides(text)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Calculate the total viewing time of a YouTube playlist."
+    )
+    parser.add_argument("playlists", nargs="*", metavar="playlist",
+                        help="playlist URL or ID")
+    parser.add_argument("--channel", metavar="CHANNEL",
+                        help="total all uploads of a channel (@handle, UC... ID or URL)")
+    parser.add_argument("--restart", action="store_true",
+                        help="with --channel, ignore a saved checkpoint and scan from the start")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="file with one playlist URL per line ('-' for stdin)")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY", ""),
+                        help="YouTube Data API v3 key (default: $YOUTUBE_API_KEY)")
+    parser.add_argument("--start", type=int, default=1,
+                        help="first video of the range (1-based, default: 1)")
+    parser.add_argument("--end", type=int, default=None,
+                        help="last video of the range (default: last video)")
+    parser.add_argument("--speeds", type=parse_speeds, default=DEFAULT_SPEEDS,
+                        help="comma separated playback speeds or low-high:step ranges "
+                             "(default: 1,1.25,1.5,1.75,2)")
+    parser.add_argument("--override", type=parse_override, action="append", default=[],
+                        metavar="VIDEO_ID=SPEED",
+                        help="always count this video at SPEED (repeatable)")
+    parser.add_argument("--workers", type=int, default=DURATION_WORKERS,
+                        help="concurrent duration lookups (default: %(default)s)")
+    parser.add_argument("--parallel", type=int, default=PLAYLIST_WORKERS,
+                        help="playlists fetched concurrently in batch mode (default: %(default)s)")
+    parser.add_argument("--quota-limit", type=int, default=None,
+                        help="stop before spending more than this many API quota units")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't read or write the local duration cache")
+    parser.add_argument("--videos", action="store_true",
+                        help="include the per-video breakdown in the output")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write request and phase timings as a Chrome trace (JSON)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write latency histograms and counters in Prometheus text format")
+    offline = parser.add_mutually_exclusive_group()
+    offline.add_argument("--record", metavar="DIR",
+                         help="save every API response to DIR as a replayable fixture")
+    offline.add_argument("--replay", metavar="DIR",
+                         help="answer requests from fixtures in DIR instead of the API")
+    offline.add_argument("--synthetic", type=int, metavar="N",
+                         help="use generated playlists of N videos instead of the API")
+    return parser
+
+
+def read_batch_file(path):
+    """Read playlist URLs from a file, skipping blank lines and # comments"""
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in handle
+                if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def format_speeds(speeds):
+    lines = []
+    for row in speeds:
+        line = f"  {row['speed']:>5}x  {format_time(row['seconds']):>12}"
+        if row['saved_seconds'] > 0:
+            line += f"  (saves {format_time(row['saved_seconds'])})"
+        lines.append(line)
+    return lines
+
+
+def format_result(result):
+    """Render a calculation result as plain text"""
+    lines = [
+        f"Playlist:       {result['playlist_id']}",
+        f"Videos:         {result['start']} to {result['end']} of {result['total_videos']}",
+        f"Total duration: {format_time(result['total_seconds'])}",
+        "",
+    ]
+    lines.extend(format_speeds(result['speeds']))
+    if 'videos' in result:
+        lines.append("")
+        for video in result['videos']:
+            line = (f"  {video['index']:>5}  {format_time(video['seconds']):>10}  "
+                    f"{video['title'] or video['id']}")
+            if 'speed' in video:
+                line += f"  (at {video['speed']}x)"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def format_channel_result(result):
+    """Render a channel scan result as plain text"""
+    lines = [
+        f"Channel:        {result['channel']} (uploads {result['playlist_id']})",
+        f"Videos:         {result['videos_scanned']} of {result['total_videos']}"
+        + (f" ({result['unavailable']} unavailable)" if result['unavailable'] else ""),
+        f"Total duration: {format_time(result['total_seconds'])}",
+    ]
+    if result['longest']['id']:
+        lines.append(f"Longest video:  {result['longest']['id']} "
+                     f"({format_time(result['longest']['seconds'])})")
+    if result['resumed']:
+        lines.append("Resumed from a saved checkpoint")
+    lines.append("")
+    lines.extend(format_speeds(result['speeds']))
+    return "\n".join(lines)
+
+
+def format_batch_result(batch):
+    """Render a batch result as plain text"""
+    lines = []
+    for result in batch['playlists']:
+        if 'error' in result:
+            lines.append(f"{result['url']}: error: {result['error']}")
+        else:
+            lines.append(f"{result['playlist_id']}: {format_time(result['total_seconds'])} "
+                         f"(videos {result['start']} to {result['end']} "
+                         f"of {result['total_videos']})")
+    lines += [
+        "",
+        f"Grand total:    {format_time(batch['total_seconds'])}",
+        f"Unique videos:  {batch['unique_videos']} ({format_time(batch['unique_seconds'])})",
+        "",
+    ]
+    lines.extend(format_speeds(batch['speeds']))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    playlists = list(args.playlists)
+    if args.batch:
+        try:
+            playlists += read_batch_file(args.batch)
+        except OSError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+    if args.channel and playlists:
+        parser.error("--channel can't be combined with playlists or --batch")
+    if not playlists and not args.channel:
+        parser.error("give at least one playlist, --batch FILE or --channel")
+
+    transport = None
+    if args.record:
+        transport = RecordingTransport(args.record)
+    elif args.replay:
+        transport = ReplayTransport(args.replay)
+    elif args.synthetic is not None:
+        transport = SyntheticTransport(videos=args.synthetic)
+
+    # Recordings must capture every request, and offline data must not end
+    # up in the real cache, so the cache is only used against the live API
+    offline = args.replay or args.synthetic is not None
+    use_cache = not args.no_cache and transport is None
+
+    if not args.api_key and not offline:
+        print("error: an API key is required (--api-key or YOUTUBE_API_KEY)", file=sys.stderr)
+        return 2
+
+    overrides = {}
+    for item in args.override:
+        overrides.update(item)
+
+    # Instrumentation is only switched on when something will be exported
+    metrics = Metrics() if args.trace or args.metrics else None
+
+    calculator = PlaylistCalculator(api_key=args.api_key, max_workers=args.workers,
+                                    include_titles=args.videos, use_cache=use_cache,
+                                    quota_limit=args.quota_limit, transport=transport,
+                                    metrics=metrics)
+    try:
+        if args.channel:
+            result = calculator.calculate_channel(args.channel, args.speeds,
+                                                  resume=not args.restart)
+        elif len(playlists) == 1:
+            result = calculator.calculate(playlists[0], args.start, args.end, args.speeds,
+                                          overrides=overrides, include_videos=args.videos)
+        else:
+            result = calculator.calculate_batch(playlists, args.start, args.end, args.speeds,
+                                                max_playlists=args.parallel, overrides=overrides,
+                                                include_videos=args.videos)
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        calculator.close()
+        if args.trace:
+            metrics.write_chrome_trace(args.trace)
+        if args.metrics:
+            metrics.write_prometheus(args.metrics)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.channel:
+        print(format_channel_result(result))
+    elif len(playlists) == 1:
+        print(format_result(result))
+    else:
+        print(format_batch_result(result))
+    if not args.json:
+        print(f"\nQuota used:     {calculator.client.scheduler.quota_used} units")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
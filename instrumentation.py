@@ -0,0 +1,201 @@
+"""Timing and counter instrumentation for the playlist time calculator
+
+A Metrics object collects spans (timed phases and requests), latency
+histograms and labelled counters, and exports them as a Chrome trace
+(chrome://tracing, Perfetto) and as Prometheus text. Code paths are
+instrumented against DISABLED by default, whose span() and count() do
+nothing, so instrumentation costs nothing unless a Metrics is passed in.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds (seconds) of the latency histogram buckets
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Trace events kept in memory; later spans still feed the histograms
+MAX_TRACE_EVENTS = 200000
+
+# Metric names and help texts for the Prometheus export
+METRIC_HELP = {
+    'yt_span_seconds': "Duration of instrumented phases",
+    'yt_request_seconds': "Latency of YouTube Data API requests",
+    'yt_requests_total': "API responses by endpoint and status",
+    'yt_response_bytes_total': "Response body bytes received on the wire (compressed)",
+    'yt_quota_units_total': "API quota units spent",
+    'yt_retries_total': "API requests retried",
+    'yt_cache_lookups_total': "Cache lookups by result",
+    'yt_cache_hit_ratio': "Share of cache lookups that were hits",
+}
+
+
+class NullMetrics:
+    """Instrumentation sink that records nothing"""
+    enabled = False
+
+    def __init__(self):
+        self.null_span = nullcontext()
+
+    def span(self, name, histogram='yt_span_seconds', **labels):
+        return self.null_span
+
+    def count(self, name, value=1, **labels):
+        pass
+
+DISABLED = NullMetrics()
+
+class Metrics:
+    """Collects spans, latency histograms and counters from one or more runs"""
+    enabled = True
+
+    def __init__(self, max_events=MAX_TRACE_EVENTS):
+        self.max_events = max_events
+        self.lock = threading.Lock()
+        self.epoch = time.perf_counter()
+        self.events = []
+        self.dropped_events = 0
+        self.thread_names = {}
+        self.histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self.counters = {}  # (name, labels) -> value
+
+    @contextmanager
+    def span(self, name, histogram='yt_span_seconds', **labels):
+        """Time a block as a trace event and a histogram observation
+
+        Labels become trace event args and histogram labels; the span's
+        own name is added as the 'name' label of yt_span_seconds.
+        """
+        started = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.add_span(name, histogram, started, time.perf_counter(), labels)
+
+    def add_span(self, name, histogram, started, finished, labels):
+        duration = finished - started
+        thread = threading.current_thread()
+        key = (histogram, label_key(labels if histogram != 'yt_span_seconds'
+                                    else dict(labels, name=name)))
+
+        with self.lock:
+            if len(self.events) < self.max_events:
+                self.events.append({
+                    'name': name,
+                    'cat': histogram,
+                    'ph': 'X',
+                    'ts': (started - self.epoch) * 1e6,
+                    'dur': duration * 1e6,
+                    'pid': os.getpid(),
+                    'tid': thread.ident,
+                    'args': {label: str(value) for label, value in labels.items()},
+                })
+                self.thread_names[thread.ident] = thread.name
+            else:
+                self.dropped_events += 1
+
+            buckets = self.histograms.get(key)
+            if buckets is None:
+                buckets = self.histograms[key] = [0] * (len(HISTOGRAM_BUCKETS) + 2)
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+                    break
+            buckets[-2] += duration
+            buckets[-1] += 1
+
+    def count(self, name, value=1, **labels):
+        """Add value to a labelled counter"""
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def counter_total(self, name, **labels):
+        """Sum of a counter over all label sets matching the given labels"""
+        wanted = set(label_key(labels))
+        with self.lock:
+            return sum(value for (counter, key), value in self.counters.items()
+                       if counter == name and wanted <= set(key))
+
+    def cache_hit_ratios(self):
+        """{cache: hit ratio} from the yt_cache_lookups_total counters"""
+        lookups = {}
+        with self.lock:
+            for (name, key), value in self.counters.items():
+                if name == 'yt_cache_lookups_total':
+                    labels = dict(key)
+                    hits, total = lookups.get(labels['cache'], (0, 0))
+                    if labels['result'] == 'hit':
+                        hits += value
+                    lookups[labels['cache']] = (hits, total + value)
+        return {cache: hits / total for cache, (hits, total) in lookups.items() if total}
+
+    def chrome_trace(self):
+        """The recorded spans in Chrome trace event format"""
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident,
+             'args': {'name': name}}
+            for ident, name in thread_names.items()
+        ]
+        return {
+            'traceEvents': metadata + events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'dropped_events': self.dropped_events},
+        }
+
+    def prometheus_text(self):
+        """Counters, histograms and cache hit ratios in Prometheus text format"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, key), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{name}{format_labels(key)} {value}")
+
+        for (name, key), buckets in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(HISTOGRAM_BUCKETS, buckets):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(key + (('le', repr(bound)),))} "
+                             f"{cumulative}")
+            lines.append(f"{name}_bucket{format_labels(key + (('le', '+Inf'),))} {buckets[-1]}")
+            lines.append(f"{name}_sum{format_labels(key)} {buckets[-2]:.6f}")
+            lines.append(f"{name}_count{format_labels(key)} {buckets[-1]}")
+
+        for cache, ratio in sorted(self.cache_hit_ratios().items()):
+            describe('yt_cache_hit_ratio', 'gauge')
+            lines.append(f"yt_cache_hit_ratio{format_labels((('cache', cache),))} {ratio:.4f}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.chrome_trace(), handle)
+
+    def write_prometheus(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(self.prometheus_text())
+
+def label_key(labels):
+    """Hashable, ordered form of a label dict"""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def format_labels(key):
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
@@ -0,0 +1,1762 @@
+"""Headless fetch, parse and aggregate logic for the playlist time calculator
+
+This module has no GUI dependencies so it can be used from the command
+line, cron jobs and containers without a display.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+import re
+import os
+import json
+import sqlite3
+from array import array
+from datetime import timedelta
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
+from itertools import accumulate
+
+from instrumentation import DISABLED
+
+# YouTube Data API settings
+API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = (5, 30)  # (connect, read) seconds
+DURATION_WORKERS = 4  # concurrent videos.list batches
+PLAYLIST_WORKERS = 4  # concurrent playlists in batch mode
+NUMPY_SUM_MIN = 10000  # shorter ranges are summed without importing numpy
+
+# Request scheduling: rate limit, retries and quota accounting
+REQUESTS_PER_SECOND = 10.0
+REQUEST_BURST = 20
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+BACKOFF_MAX = 32.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError"}
+QUOTA_COSTS = {"playlistItems": 1, "videos": 1, "channels": 1}  # units per list call
+
+# Local duration cache settings
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".yt_playlist_calculator", "cache.sqlite3")
+CACHE_TTL = 30 * 24 * 3600  # seconds
+CACHE_MAX_ENTRIES = 200000
+
+# Checkpoints of channel scans, so an interrupted scan can resume
+SCAN_CHECKPOINT_DIR = os.path.join(os.path.expanduser("~"), ".yt_playlist_calculator", "scans")
+SCAN_CHECKPOINT_INTERVAL = 2.0  # seconds between checkpoint writes
+
+# Response projections: only the keys the calculator actually reads
+PLAYLIST_FIELDS_WITH_TITLES = "etag,nextPageToken,pageInfo/totalResults,items/snippet(title,resourceId/videoId)"
+PLAYLIST_FIELDS_IDS_ONLY = "etag,nextPageToken,pageInfo/totalResults,items/contentDetails/videoId"
+VIDEO_FIELDS = "items(id,contentDetails/duration)"
+CHANNEL_FIELDS = "items(id,contentDetails/relatedPlaylists/uploads)"
+
+# ISO 8601 durations as returned by YouTube: PT1H2M3S, P1DT2H, P0D, P2W, ...
+# Years and months are not fixed lengths; they count as 365 and 30 days.
+DURATION_PATTERN = re.compile(
+    r'P(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)W)?(?:(\d+)D)?'
+    r'(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)(?:[.,]\d+)?S)?)?'
+)
+# Fast path for the common PT#H#M#S form
+TIME_DURATION_PATTERN = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
+# Scans a whole batch, one duration per line; other forms land in the last group
+TIME_DURATION_LINES = re.compile(r'^(?:PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?|(.+))$', re.MULTILINE)
+
+# Playback speeds shown by default
+DEFAULT_SPEEDS = [1.0, 1.25, 1.5, 1.75, 2.0]
+# Accepted bounds and default step for user-defined speed sets
+MIN_SPEED = 0.1
+MAX_SPEED = 16.0
+SPEED_STEP = 0.25
+
+class APIError(Exception):
+    """A YouTube Data API request failed"""
+    def __init__(self, message, status_code=None, reason=None, retryable=False,
+                 retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+        self.retryable = retryable
+        self.retry_after = retry_after
+        # Set by pagination so a later run can resume from this page
+        self.page_token = None
+
+class CalculationCancelled(Exception):
+    """A calculation was cancelled before it finished"""
+
+class RequestScheduler:
+    """Token-bucket rate limiting, retry with backoff and quota accounting
+    
+    Every API call goes through call(): it waits for a token, charges the
+    endpoint's quota cost and retries retryable failures (429, 5xx,
+    rate-limit 403s, connection errors) with exponential backoff and full
+    jitter, honouring Retry-After when the server sends one.
+    """
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=REQUEST_BURST,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX, quota_limit=None, metrics=DISABLED):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.quota_limit = quota_limit
+        self.metrics = metrics
+        
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.quota_used = 0
+        self.retries = 0
+        
+    def acquire(self):
+        """Block until the token bucket allows another request"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+        
+    def charge(self, endpoint):
+        """Account the quota cost of one call, refusing to exceed quota_limit"""
+        cost = QUOTA_COSTS.get(endpoint, 1)
+        with self.lock:
+            if self.quota_limit is not None and self.quota_used + cost > self.quota_limit:
+                raise APIError(f"API Error: quota limit of {self.quota_limit} units reached",
+                               reason="quotaLimit")
+            self.quota_used += cost
+        self.metrics.count('yt_quota_units_total', cost, endpoint=endpoint)
+        
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        
+    def call(self, endpoint, send):
+        """Run send() under the rate limit, retrying retryable failures"""
+        attempt = 0
+        while True:
+            self.acquire()
+            self.charge(endpoint)
+            
+            try:
+                return send()
+            except APIError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = e.retry_after if e.retry_after is not None else self.backoff(attempt)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise APIError(f"API Error: {e}") from e
+                delay = self.backoff(attempt)
+            
+            attempt += 1
+            with self.lock:
+                self.retries += 1
+            self.metrics.count('yt_retries_total', endpoint=endpoint)
+            time.sleep(min(delay, self.backoff_max))
+
+class HTTPTransport:
+    """Sends API requests over a pooled, keep-alive requests.Session
+    
+    A transport turns (endpoint, params, headers) into a response with
+    status_code, headers, text and json(). Offline transports for
+    recording, replay and synthetic load live in api_fixtures.py.
+    """
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, base_url=API_BASE_URL):
+        self.timeout = timeout
+        self.base_url = base_url
+        
+        # One session reuses TCP/TLS connections across pages and batches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        
+    def send(self, endpoint, params, headers=None):
+        return self.session.get(f"{self.base_url}/{endpoint}", params=params,
+                                headers=headers, timeout=self.timeout)
+        
+    def close(self):
+        self.session.close()
+
+class YouTubeAPIClient:
+    """Rate-limited, retrying client for the YouTube Data API"""
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, scheduler=None,
+                 transport=None, metrics=DISABLED):
+        self.scheduler = scheduler or RequestScheduler(metrics=metrics)
+        self.transport = transport or HTTPTransport(pool_size, timeout)
+        self.metrics = metrics
+        
+    def get(self, endpoint, params, etag=None):
+        """GET an API endpoint and return the decoded JSON body
+        
+        When an etag is given the request is conditional (If-None-Match)
+        and None is returned if the server answers 304 Not Modified.
+        Requests are rate limited and retried by the scheduler.
+        """
+        return self.scheduler.call(endpoint, lambda: self._send(endpoint, params, etag))
+        
+    def _send(self, endpoint, params, etag):
+        headers = {"If-None-Match": etag} if etag else None
+        with self.metrics.span(endpoint, 'yt_request_seconds', endpoint=endpoint):
+            response = self.transport.send(endpoint, params, headers)
+        
+        if self.metrics.enabled:
+            self.metrics.count('yt_requests_total', endpoint=endpoint,
+                               status=response.status_code)
+            self.metrics.count('yt_response_bytes_total', wire_bytes(response),
+                               endpoint=endpoint)
+        
+        if etag and response.status_code == 304:
+            return None
+        
+        if response.status_code != 200:
+            raise self._error(response)
+        
+        return response.json()
+        
+    def _error(self, response):
+        """Build an APIError, classifying whether it is worth retrying"""
+        reason = None
+        try:
+            errors = response.json()['error'].get('errors') or [{}]
+            reason = errors[0].get('reason')
+        except (ValueError, KeyError, TypeError, AttributeError):
+            pass
+        
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        
+        retryable = response.status_code in RETRYABLE_STATUS or reason in RETRYABLE_REASONS
+        return APIError(f"API Error: {response.status_code} - {response.text}",
+                        status_code=response.status_code, reason=reason,
+                        retryable=retryable, retry_after=retry_after)
+        
+    def close(self):
+        self.transport.close()
+
+class DurationCache:
+    """Persistent SQLite cache of video durations with TTL and LRU eviction"""
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS durations ("
+            "video_id TEXT PRIMARY KEY, seconds INTEGER NOT NULL, "
+            "fetched_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS durations_last_used ON durations (last_used)"
+        )
+        self.conn.commit()
+        
+    def get_many(self, video_ids):
+        """Return {video_id: seconds} for the IDs with a fresh cache entry"""
+        now = time.time()
+        found = {}
+        
+        with self.lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(video_ids), 500):
+                chunk = video_ids[i:i+500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT video_id, seconds FROM durations "
+                    f"WHERE video_id IN ({placeholders}) AND fetched_at >= ? AND seconds > 0",
+                    (*chunk, now - self.ttl)
+                ).fetchall()
+                found.update(rows)
+            
+            if found:
+                self.conn.executemany(
+                    "UPDATE durations SET last_used = ? WHERE video_id = ?",
+                    [(now, video_id) for video_id in found]
+                )
+                self.conn.commit()
+        
+        return found
+        
+    def put_many(self, durations):
+        """Store {video_id: seconds} and evict least recently used entries"""
+        # 0 s is a live or upcoming stream (P0D); it gets a real length once it ends
+        now = time.time()
+        rows = [(video_id, seconds, now, now) for video_id, seconds in durations.items()
+                if seconds > 0]
+        if not rows:
+            return
+        
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?)", rows
+            )
+            
+            count = self.conn.execute("SELECT COUNT(*) FROM durations").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM durations WHERE video_id IN ("
+                    "SELECT video_id FROM durations ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+        
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class PlaylistSnapshotStore:
+    """Per-page playlist snapshots (videos, ETag, next token) stored in SQLite"""
+    def __init__(self, path=CACHE_PATH):
+        self.lock = threading.Lock()
+        
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS playlist_pages ("
+            "playlist_id TEXT NOT NULL, page_token TEXT NOT NULL, etag TEXT NOT NULL, "
+            "next_page_token TEXT, total_results INTEGER NOT NULL, videos TEXT NOT NULL, "
+            "PRIMARY KEY (playlist_id, page_token))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS playlist_indexes ("
+            "playlist_id TEXT PRIMARY KEY, total_videos INTEGER NOT NULL, "
+            "offset INTEGER NOT NULL, video_ids TEXT NOT NULL, titles TEXT NOT NULL, "
+            "seconds BLOB NOT NULL, complete INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Indexes stored before the complete flag existed count as incomplete
+        index_columns = [row[1] for row in self.conn.execute("PRAGMA table_info(playlist_indexes)")]
+        if 'complete' not in index_columns:
+            self.conn.execute(
+                "ALTER TABLE playlist_indexes ADD COLUMN complete INTEGER NOT NULL DEFAULT 0"
+            )
+        self.conn.commit()
+        
+    def load_page(self, playlist_id, page_token):
+        """Return the stored page for a token, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, next_page_token, total_results, videos FROM playlist_pages "
+                "WHERE playlist_id = ? AND page_token = ?",
+                (playlist_id, page_token or "")
+            ).fetchone()
+        
+        if row is None:
+            return None
+        
+        etag, next_page_token, total_results, videos = row
+        return {
+            'etag': etag,
+            'next_page_token': next_page_token,
+            'total_results': total_results,
+            'videos': json.loads(videos),
+        }
+        
+    def save_page(self, playlist_id, page_token, etag, next_page_token, total_results, videos):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO playlist_pages VALUES (?, ?, ?, ?, ?, ?)",
+                (playlist_id, page_token or "", etag, next_page_token,
+                 total_results, json.dumps(videos))
+            )
+            self.conn.commit()
+        
+    def save_index(self, index):
+        """Persist a PrefixSumIndex next to the playlist's pages"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO playlist_indexes (playlist_id, total_videos, offset, "
+                "video_ids, titles, seconds, complete) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (index.playlist_id, index.total_videos, index.offset,
+                 json.dumps(index.columns.ids()), json.dumps(index.columns.titles),
+                 index.columns.seconds.tobytes(), int(index.complete))
+            )
+            self.conn.commit()
+        
+    def load_index(self, playlist_id):
+        """Return the stored PrefixSumIndex for a playlist, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT total_videos, offset, video_ids, titles, seconds, complete "
+                "FROM playlist_indexes WHERE playlist_id = ?",
+                (playlist_id,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        
+        total_videos, offset, video_ids, titles, blob, complete = row
+        seconds = array('I')
+        seconds.frombytes(blob)
+        # Indexes saved before titles were optional hold a list of empty titles
+        titles = json.loads(titles)
+        columns = VideoColumns.from_lists(json.loads(video_ids),
+                                          titles if titles and any(titles) else None, seconds)
+        return PrefixSumIndex(playlist_id, total_videos, offset, columns, built_at=0,
+                              complete=bool(complete))
+        
+    def get_snapshot(self, playlist_id):
+        """Return the stored ordered video list for a playlist by following page tokens"""
+        videos = []
+        page_token = ""
+        seen = set()
+        
+        while page_token is not None and page_token not in seen:
+            seen.add(page_token)
+            page = self.load_page(playlist_id, page_token)
+            if page is None:
+                break
+            videos.extend(page['videos'])
+            page_token = page['next_page_token']
+        
+        return videos
+        
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class VideoColumns:
+    """Playlist videos in compact columns instead of one dict per video
+    
+    Video IDs are packed back to back into one ASCII buffer with an
+    array('I') of end offsets, durations live in an array('I') (0 until
+    filled in) and titles are only kept when asked for. A six-figure
+    playlist costs a few bytes per video, and totals and slices run over
+    the buffers; per-video dicts are only built for the rows of a result.
+    """
+    def __init__(self, keep_titles=True):
+        self.id_bytes = bytearray()
+        self.id_ends = array('I')
+        self.seconds = array('I')
+        self.titles = [] if keep_titles else None
+        
+    @classmethod
+    def from_lists(cls, video_ids, titles=None, seconds=None):
+        columns = cls(keep_titles=titles is not None)
+        columns.append_page([{'id': video_id} for video_id in video_ids])
+        if titles is not None:
+            columns.titles = list(titles)
+        if seconds is not None:
+            columns.seconds = array('I', seconds)
+        return columns
+        
+    def __len__(self):
+        return len(self.seconds)
+        
+    def append_page(self, page):
+        """Append a page of {'id', 'title'} dicts from iter_playlist_pages"""
+        for video in page:
+            self.id_bytes += video['id'].encode('ascii')
+            self.id_ends.append(len(self.id_bytes))
+        if self.titles is not None:
+            self.titles.extend(video.get('title', '') for video in page)
+        self.seconds.frombytes(bytes(self.seconds.itemsize * len(page)))
+        
+    def truncate(self, length):
+        """Drop every video from position `length` on"""
+        if length < len(self):
+            del self.id_bytes[self.id_ends[length - 1] if length else 0:]
+            del self.id_ends[length:]
+            del self.seconds[length:]
+            if self.titles is not None:
+                del self.titles[length:]
+        
+    def bounds(self, lo=0, hi=None):
+        hi = len(self) if hi is None else min(hi, len(self))
+        return lo, max(lo, hi)
+        
+    def ids(self, lo=0, hi=None):
+        """Video IDs of positions lo..hi-1 as a list of strings"""
+        lo, hi = self.bounds(lo, hi)
+        if lo == hi:
+            return []
+        base = self.id_ends[lo - 1] if lo else 0
+        text = self.id_bytes[base:self.id_ends[hi - 1]].decode('ascii')
+        ids = []
+        start = 0
+        for end in self.id_ends[lo:hi]:
+            ids.append(text[start:end - base])
+            start = end - base
+        return ids
+        
+    def fill_durations(self, durations, lo=0, hi=None):
+        """Copy {video_id: seconds} into the duration column for lo..hi-1"""
+        lo, hi = self.bounds(lo, hi)
+        self.seconds[lo:hi] = array('I', [durations.get(video_id, 0)
+                                          for video_id in self.ids(lo, hi)])
+        
+    def fill_batch(self, position, video_ids, durations):
+        """Write durations for the IDs stored from `position` on; return their sum"""
+        total = 0
+        for i, video_id in enumerate(video_ids, position):
+            seconds = durations.get(video_id)
+            if seconds is not None:
+                self.seconds[i] = seconds
+                total += seconds
+        return total
+        
+    def total_seconds(self, lo=0, hi=None):
+        """Sum of the duration column over lo..hi-1"""
+        lo, hi = self.bounds(lo, hi)
+        np = _numpy() if hi - lo >= NUMPY_SUM_MIN else None
+        if np is not None:
+            return int(np.frombuffer(self.seconds, dtype=np.uint32)[lo:hi].sum(dtype=np.uint64))
+        return sum(self.seconds[lo:hi])
+        
+    def slice(self, lo=0, hi=None):
+        """A copy holding only positions lo..hi-1"""
+        lo, hi = self.bounds(lo, hi)
+        titles = self.titles[lo:hi] if self.titles is not None else None
+        return VideoColumns.from_lists(self.ids(lo, hi), titles, self.seconds[lo:hi])
+        
+    def rows(self, lo=0, hi=None, offset=0):
+        """Result rows ({'index', 'id', 'title', 'seconds'}) for lo..hi-1"""
+        lo, hi = self.bounds(lo, hi)
+        titles = self.titles[lo:hi] if self.titles is not None else [''] * (hi - lo)
+        return [
+            {
+                'index': offset + lo + i + 1,
+                'id': video_id,
+                'title': title,
+                'seconds': seconds,
+            }
+            for i, (video_id, title, seconds)
+            in enumerate(zip(self.ids(lo, hi), titles, self.seconds[lo:hi]))
+        ]
+
+class PrefixSumIndex:
+    """Cumulative durations over an ordered stretch of a playlist
+    
+    Covers the 1-based positions offset+1 .. offset+len(columns). Any
+    range inside that stretch is totalled in O(1) from the prefix sums,
+    without touching the network. built_at is the time.time() of the fetch,
+    or 0 when unknown (indexes loaded from disk). complete means the fetch
+    reached the last page, so the stretch ends where the playlist does even
+    if pageInfo.totalResults (total_videos) promised more.
+    """
+    def __init__(self, playlist_id, total_videos, offset, columns, built_at=None,
+                 complete=False):
+        self.playlist_id = playlist_id
+        self.built_at = time.time() if built_at is None else built_at
+        self.complete = complete
+        self.total_videos = total_videos
+        self.offset = offset
+        self.columns = columns
+        
+        self.prefix = array('Q', [0])
+        self.prefix.extend(accumulate(columns.seconds))
+        
+    @property
+    def covered_end(self):
+        return self.offset + len(self.columns)
+        
+    def resolve_range(self, start=1, end=None):
+        """Clamp a 1-based inclusive range to the playlist; None if not covered"""
+        start_idx = max(1, start) - 1
+        last = self.covered_end if self.complete else self.total_videos
+        end_idx = last if end is None else min(end, last)
+        if start_idx < self.offset or end_idx > self.covered_end or start_idx >= end_idx:
+            return None
+        return start_idx, end_idx
+        
+    def range_seconds(self, start=1, end=None):
+        """Total seconds of a 1-based inclusive range (None if not covered)"""
+        bounds = self.resolve_range(start, end)
+        if bounds is None:
+            return None
+        start_idx, end_idx = bounds
+        return self.prefix[end_idx - self.offset] - self.prefix[start_idx - self.offset]
+        
+    def summarize(self, start=1, end=None, speeds=DEFAULT_SPEEDS, overrides=None,
+                  include_videos=True):
+        """A calculate()-style result for a range, or None if not covered"""
+        bounds = self.resolve_range(start, end)
+        if bounds is None:
+            return None
+        start_idx, end_idx = bounds
+        lo, hi = start_idx - self.offset, end_idx - self.offset
+        total_seconds = self.prefix[hi] - self.prefix[lo]
+        return range_result(self.playlist_id, self.total_videos, self.columns, lo, hi,
+                            total_seconds, speeds, overrides, self.offset, include_videos)
+
+class ScanCheckpoint:
+    """Running totals of a channel scan in a small JSON file"""
+    def __init__(self, path):
+        self.path = path
+        
+    def load(self):
+        """Return the saved scan state, or None"""
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+        
+    def save(self, state):
+        # Replace atomically so a crash never leaves half a checkpoint
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(state, handle)
+        os.replace(temp_path, self.path)
+        
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+class ProgressTracker:
+    """Thread-safe running counts for one fetch, published as progress events
+    
+    Events are plain dicts with pages_fetched/pages_total, videos_listed,
+    total_videos, ids_resolved/ids_total, the running total_seconds of the
+    resolved range and an ETA in seconds (None until it can be estimated).
+    """
+    def __init__(self, callback=None, start_idx=0, end_idx=None):
+        self.callback = callback
+        self.start_idx = start_idx
+        self.end_idx = end_idx
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        
+        self.pages_fetched = 0
+        self.videos_listed = 0
+        self.total_videos = 0
+        self.ids_resolved = 0
+        self.total_seconds = 0
+        
+    def page_done(self, videos_listed, total_videos):
+        with self.lock:
+            self.pages_fetched += 1
+            self.videos_listed = videos_listed
+            self.total_videos = total_videos
+        self.publish()
+        
+    def resolved(self, count, seconds):
+        with self.lock:
+            self.ids_resolved += count
+            self.total_seconds += seconds
+        self.publish()
+        
+    def snapshot(self):
+        """Current progress as an event dict"""
+        with self.lock:
+            end = self.total_videos if self.end_idx is None else min(self.end_idx, self.total_videos)
+            ids_total = max(0, end - self.start_idx)
+            eta = None
+            if 0 < self.ids_resolved < ids_total:
+                elapsed = time.monotonic() - self.started
+                eta = elapsed * (ids_total - self.ids_resolved) / self.ids_resolved
+            elif ids_total and self.ids_resolved >= ids_total:
+                eta = 0.0
+            return {
+                'pages_fetched': self.pages_fetched,
+                'pages_total': -(-end // 50),
+                'videos_listed': self.videos_listed,
+                'total_videos': self.total_videos,
+                'ids_resolved': self.ids_resolved,
+                'ids_total': ids_total,
+                'total_seconds': self.total_seconds,
+                'eta': eta,
+            }
+        
+    def publish(self):
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+class PlaylistCalculator:
+    """Fetches playlist videos and durations and aggregates viewing time"""
+    def __init__(self, api_key="", pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT,
+                 max_workers=DURATION_WORKERS, include_titles=True, use_cache=True,
+                 quota_limit=None, transport=None, metrics=None):
+        self.api_key = api_key
+        
+        # Timings and counters; a no-op sink unless a Metrics is given
+        self.metrics = metrics or DISABLED
+        
+        # Shared client for all API traffic (HTTP unless another transport is given)
+        scheduler = RequestScheduler(quota_limit=quota_limit, metrics=self.metrics)
+        self.client = YouTubeAPIClient(pool_size=pool_size, timeout=timeout,
+                                       scheduler=scheduler, transport=transport,
+                                       metrics=self.metrics)
+        self.max_workers = max_workers
+        self.include_titles = include_titles
+        
+        # Pagination progress of failed walks, so a retry resumes mid-playlist
+        self.checkpoints = {}
+        
+        # Prefix-sum indexes of fetched playlists for instant range queries
+        self.indexes = {}
+        
+        # Local duration cache (the calculator still works without it)
+        self.cache = None
+        self.snapshots = None
+        if use_cache:
+            try:
+                self.cache = DurationCache()
+                self.snapshots = PlaylistSnapshotStore()
+            except (OSError, sqlite3.Error):
+                self.cache = None
+                self.snapshots = None
+        
+    def iter_playlist_pages(self, playlist_id, page_token=None):
+        """Yield (videos, total_results) for a playlist one API page at a time
+        
+        Pages already in the snapshot store are requested conditionally with
+        their ETag; unchanged pages (304) are served from the snapshot and
+        only new or changed pages are parsed and stored again.
+        
+        With include_titles off only contentDetails/videoId is requested and
+        the videos carry no 'title' key. Pagination starts at page_token if
+        given; a failing page is recorded on the raised APIError.
+        """
+        next_page_token = page_token
+        
+        while True:
+            page, total_results, next_page_token = self.fetch_playlist_page(
+                playlist_id, next_page_token
+            )
+            yield page, total_results
+            
+            if not next_page_token:
+                break
+    
+    def fetch_playlist_page(self, playlist_id, page_token=None, titles=None):
+        """Fetch one page of a playlist as (videos, total_results, next_page_token)
+        
+        titles overrides include_titles for this request.
+        """
+        titles = self.include_titles if titles is None else titles
+        if titles:
+            params = {'part': 'snippet', 'fields': PLAYLIST_FIELDS_WITH_TITLES}
+        else:
+            params = {'part': 'contentDetails', 'fields': PLAYLIST_FIELDS_IDS_ONLY}
+        params.update({
+            'playlistId': playlist_id,
+            'maxResults': 50,
+            'key': self.api_key
+        })
+        
+        if page_token:
+            params['pageToken'] = page_token
+        
+        snapshot = None
+        if self.snapshots is not None:
+            snapshot = self.snapshots.load_page(playlist_id, page_token)
+            
+            # A title-less snapshot can't answer a request that needs titles
+            if (snapshot and titles
+                    and any('title' not in video for video in snapshot['videos'])):
+                snapshot = None
+        
+        try:
+            data = self.client.get('playlistItems', params,
+                                   etag=snapshot['etag'] if snapshot else None)
+        except APIError as e:
+            e.page_token = page_token
+            raise
+        
+        if self.snapshots is not None:
+            self.metrics.count('yt_cache_lookups_total', cache='snapshots',
+                               result='hit' if data is None else 'miss')
+        
+        if data is None:
+            # Not modified since the snapshot
+            return snapshot['videos'], snapshot['total_results'], snapshot['next_page_token']
+        
+        page = []
+        for item in data.get('items', []):
+            if titles:
+                video_id = item['snippet']['resourceId']['videoId']
+                title = item['snippet']['title']
+                page.append({'id': video_id, 'title': title})
+            else:
+                page.append({'id': item['contentDetails']['videoId']})
+        
+        total_results = data.get('pageInfo', {}).get('totalResults', 0)
+        next_page_token = data.get('nextPageToken')
+        
+        if self.snapshots is not None and data.get('etag'):
+            with self.metrics.span('snapshot_write'):
+                self.snapshots.save_page(playlist_id, page_token, data['etag'],
+                                         next_page_token, total_results, page)
+        
+        return page, total_results, next_page_token
+    
+    def resolve_uploads_playlist(self, channel):
+        """Return the uploads playlist ID of a channel handle, ID or URL"""
+        kind, value = extract_channel(channel)
+        if kind is None:
+            raise Exception("Invalid channel handle, ID or URL")
+        
+        params = {
+            'part': 'contentDetails',
+            'fields': CHANNEL_FIELDS,
+            kind: value,
+            'key': self.api_key
+        }
+        items = self.client.get('channels', params).get('items') or []
+        if not items:
+            raise Exception(f"Channel not found: {channel}")
+        return items[0]['contentDetails']['relatedPlaylists']['uploads']
+    
+    def calculate_channel(self, channel, speeds=DEFAULT_SPEEDS, progress=None, cancel_event=None,
+                          checkpoint_dir=SCAN_CHECKPOINT_DIR, resume=True):
+        """Total viewing time of every upload of a channel, in constant memory
+        
+        The channel's uploads playlist is streamed page by page into running
+        totals, with at most a few pages of duration lookups in flight, so
+        memory does not grow with the channel. Totals and the next page
+        token are checkpointed under checkpoint_dir (None disables this);
+        a later call for the same channel resumes where the scan stopped.
+        """
+        playlist_id = self.resolve_uploads_playlist(channel)
+        
+        checkpoint = None
+        if checkpoint_dir is not None:
+            checkpoint = ScanCheckpoint(os.path.join(checkpoint_dir, f"{playlist_id}.json"))
+        
+        state = checkpoint.load() if checkpoint is not None and resume else None
+        resumed = state is not None and state.get('playlist_id') == playlist_id
+        if not resumed:
+            state = {
+                'playlist_id': playlist_id,
+                'page_token': None,
+                'total_videos': 0,
+                'videos_scanned': 0,
+                'unavailable': 0,
+                'total_seconds': 0,
+                'longest_id': None,
+                'longest_seconds': 0,
+            }
+        
+        tracker = ProgressTracker(progress, start_idx=state['videos_scanned'])
+        stop_event = threading.Event()
+        in_flight = deque()  # (video_ids, cached durations, lookup, next page token)
+        videos_listed = state['videos_scanned']
+        last_saved = time.monotonic()
+        
+        def fold(video_ids, durations, lookup, next_page_token):
+            # Pages are folded in order, so the checkpoint never skips one
+            if lookup is not None:
+                durations.update(lookup.result())
+            check_cancelled(cancel_event)
+            
+            page_seconds = 0
+            for video_id in video_ids:
+                seconds = durations.get(video_id)
+                if seconds is None:
+                    # Private or deleted uploads have no duration
+                    state['unavailable'] += 1
+                    continue
+                page_seconds += seconds
+                if seconds > state['longest_seconds']:
+                    state['longest_id'] = video_id
+                    state['longest_seconds'] = seconds
+            
+            state['videos_scanned'] += len(video_ids)
+            state['total_seconds'] += page_seconds
+            state['page_token'] = next_page_token
+            tracker.resolved(len(video_ids), page_seconds)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            page_token = state['page_token']
+            try:
+                while True:
+                    check_cancelled(cancel_event)
+                    page, total_results, page_token = self.fetch_playlist_page(
+                        playlist_id, page_token, titles=False
+                    )
+                    state['total_videos'] = max(total_results, videos_listed + len(page))
+                    videos_listed += len(page)
+                    tracker.page_done(videos_listed, state['total_videos'])
+                    
+                    video_ids = [video['id'] for video in page]
+                    durations = {}
+                    missing = self._lookup_cached(video_ids, durations)
+                    lookup = None
+                    if missing:
+                        lookup = executor.submit(self._fetch_duration_batch, missing,
+                                                 stop_event, cancel_event)
+                    in_flight.append((video_ids, durations, lookup, page_token))
+                    
+                    # Bound the pages in flight; drain everything after the last page
+                    while in_flight and (len(in_flight) > self.max_workers * 2 or not page_token):
+                        fold(*in_flight.popleft())
+                    
+                    now = time.monotonic()
+                    if checkpoint is not None and now - last_saved >= SCAN_CHECKPOINT_INTERVAL:
+                        checkpoint.save(state)
+                        last_saved = now
+                    
+                    if not page_token:
+                        break
+            except Exception:
+                stop_event.set()
+                for _, _, lookup, _ in in_flight:
+                    if lookup is not None:
+                        lookup.cancel()
+                if checkpoint is not None:
+                    checkpoint.save(state)
+                raise
+        
+        if checkpoint is not None:
+            checkpoint.clear()
+        
+        return {
+            'channel': channel,
+            'playlist_id': playlist_id,
+            'total_videos': state['total_videos'],
+            'videos_scanned': state['videos_scanned'],
+            'unavailable': state['unavailable'],
+            'total_seconds': state['total_seconds'],
+            'speeds': calculate_speeds(state['total_seconds'], speeds),
+            'longest': {'id': state['longest_id'], 'seconds': state['longest_seconds']},
+            'resumed': resumed,
+        }
+    
+    def get_playlist_videos(self, playlist_id, limit=None):
+        """Get videos from a playlist, stopping once `limit` are collected"""
+        videos = []
+        for page, _ in self.iter_playlist_pages(playlist_id):
+            videos.extend(page)
+            if limit is not None and len(videos) >= limit:
+                del videos[limit:]
+                break
+        return videos
+    
+    def get_playlist_with_durations(self, playlist_id, start_idx=0, end_idx=None, progress=None,
+                                    cancel_event=None):
+        """Get playlist videos and their durations in one pipelined pass
+        
+        Each page's video IDs are handed to a background lookup while the
+        next page token is being fetched, so pagination and duration
+        requests overlap. Only videos in [start_idx, end_idx) are looked up,
+        and pagination stops as soon as end_idx videos have been collected.
+        
+        Returns (columns, total_videos): a VideoColumns whose durations are
+        filled in for the range, and total_videos from pageInfo.totalResults
+        rather than a full walk. Each batch writes its durations straight
+        into the columns as it finishes, so no playlist-sized dict is built.
+        
+        If the call fails for any reason (a page or duration lookup error,
+        cancellation) after pages were collected, they are checkpointed
+        with the token of the next page to fetch, and the next call for
+        the same playlist resumes pagination there. Checkpoints live in
+        memory, so resuming only works within one process; a new process
+        walks from the first page again (unchanged pages come back as
+        304s from the snapshot store).
+        
+        progress, if given, is called with ProgressTracker event dicts as
+        pages arrive and IDs are resolved (possibly from worker threads).
+        Setting cancel_event stops the walk between pages and batches with
+        CalculationCancelled.
+        """
+        columns = VideoColumns(keep_titles=self.include_titles)
+        columns_lock = threading.Lock()  # pages are appended while batches fill durations
+        resolved = bytearray()  # 1 for each position whose duration is filled in
+        lookups = []
+        total_videos = 0
+        page_token = None
+        finished = False  # the last page has been collected
+        stop_event = threading.Event()
+        tracker = ProgressTracker(progress, start_idx, end_idx)
+        
+        checkpoint = self.checkpoints.pop(playlist_id, None)
+        if checkpoint is not None:
+            columns = checkpoint['columns']
+            total_videos = checkpoint['total_videos']
+            page_token = checkpoint['page_token']
+            finished = checkpoint['finished']
+            resolved = checkpoint['resolved']
+        
+        def range_collected():
+            return end_idx is not None and len(columns) >= end_idx
+        
+        def lookup_batch(position, batch, video_ids):
+            # Returns only the seconds written, so finished lookups hold no dicts
+            durations = self._fetch_duration_batch(video_ids, stop_event, cancel_event)
+            with columns_lock:
+                seconds = columns.fill_batch(position, batch, durations)
+                # A stopped or cancelled batch may have returned early with nothing
+                if not stop_event.is_set() and not (cancel_event is not None
+                                                    and cancel_event.is_set()):
+                    resolved[position:position + len(batch)] = b"\x01" * len(batch)
+            return seconds
+        
+        def record_lookup(count, lookup):
+            if not lookup.cancelled() and lookup.exception() is None:
+                tracker.resolved(count, lookup.result())
+        
+        def submit_lookups(page_start):
+            # Only look up the part of this page inside the range
+            lo = max(start_idx, page_start)
+            hi = len(columns) if end_idx is None else min(end_idx, len(columns))
+            if lo < hi:
+                for i in range(lo, hi, 50):
+                    j = min(i + 50, hi)
+                    # Batches finished before a resume are not looked up again
+                    if resolved.find(0, i, j) == -1:
+                        with columns_lock:
+                            seconds = columns.total_seconds(i, j)
+                        tracker.resolved(j - i, seconds)
+                        continue
+                    
+                    batch = columns.ids(i, j)
+                    cached = {}
+                    video_ids = self._lookup_cached(batch, cached)
+                    
+                    if cached:
+                        with columns_lock:
+                            seconds = columns.fill_batch(i, batch, cached)
+                            if not video_ids:
+                                resolved[i:j] = b"\x01" * len(batch)
+                        tracker.resolved(len(batch) - len(video_ids), seconds)
+                    
+                    if video_ids:
+                        lookup = executor.submit(lookup_batch, i, batch, video_ids)
+                        lookup.add_done_callback(partial(record_lookup, len(video_ids)))
+                        lookups.append(lookup)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                submit_lookups(0)
+                
+                # A resumed walk may already hold every page it needs
+                done = finished or (checkpoint is not None and range_collected())
+                while not done:
+                    page, total_videos, next_page_token = self.fetch_playlist_page(
+                        playlist_id, page_token
+                    )
+                    check_cancelled(cancel_event)
+                    page_start = len(columns)
+                    with columns_lock:
+                        columns.append_page(page)
+                        resolved.extend(bytes(len(page)))
+                    page_token = next_page_token
+                    finished = not next_page_token
+                    tracker.page_done(len(columns), max(total_videos, len(columns)))
+                    submit_lookups(page_start)
+                    
+                    # Stop at the last page, once the range is collected, or
+                    # when a failed lookup has stopped the others
+                    done = finished or range_collected() or stop_event.is_set()
+                
+                self._collect_durations(lookups, None, stop_event, cancel_event)
+            except Exception:
+                stop_event.set()
+                for lookup in lookups:
+                    lookup.cancel()
+                
+                # Keep the pages collected so far; the next call resumes after them
+                if len(columns):
+                    self.checkpoints[playlist_id] = {
+                        'columns': columns,
+                        'total_videos': total_videos,
+                        'page_token': page_token,
+                        'finished': finished,
+                        'resolved': resolved,
+                    }
+                raise
+        
+        if end_idx is not None:
+            columns.truncate(end_idx)
+        return columns, max(total_videos, len(columns))
+    
+    def get_video_durations(self, video_ids, cancel_event=None, errors=None):
+        """Get durations for multiple videos using a bounded worker pool
+        
+        By default the first failing batch cancels the rest and is raised.
+        If errors is a dict, every batch runs to completion instead and the
+        IDs of a failed batch are recorded in it as {video_id: message}.
+        """
+        durations = {}
+        stop_event = threading.Event()
+        
+        # Only ask the API for IDs that miss the cache
+        video_ids = self._lookup_cached(video_ids, durations)
+        batches = [video_ids[i:i+50] for i in range(0, len(video_ids), 50)]
+        
+        # Process in batches of 50 (API limit)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if errors is None:
+                lookups = [
+                    executor.submit(self._fetch_duration_batch, batch, stop_event, cancel_event)
+                    for batch in batches
+                ]
+                self._collect_durations(lookups, durations, stop_event, cancel_event)
+                return durations
+            
+            # Each batch gets its own stop event so one failure doesn't stop the others
+            lookups = {
+                executor.submit(self._fetch_duration_batch, batch, threading.Event(),
+                                cancel_event): batch
+                for batch in batches
+            }
+            for lookup in as_completed(lookups):
+                try:
+                    durations.update(lookup.result())
+                except CalculationCancelled:
+                    raise
+                except Exception as e:
+                    errors.update(dict.fromkeys(lookups[lookup], str(e)))
+            check_cancelled(cancel_event)
+        
+        return durations
+    
+    def _fetch_duration_batch(self, batch, stop_event, cancel_event=None):
+        """Fetch durations for up to 50 video IDs"""
+        if stop_event.is_set() or (cancel_event is not None and cancel_event.is_set()):
+            return {}
+        
+        params = {
+            'part': 'contentDetails',
+            'fields': VIDEO_FIELDS,
+            'id': ','.join(batch),
+            'key': self.api_key
+        }
+        
+        try:
+            data = self.client.get('videos', params)
+        except Exception:
+            stop_event.set()
+            raise
+        
+        items = data.get('items', [])
+        with self.metrics.span('parse_durations'):
+            durations = dict(zip(
+                [item['id'] for item in items],
+                parse_durations([item['contentDetails']['duration'] for item in items])
+            ))
+        
+        if self.cache is not None:
+            with self.metrics.span('cache_write'):
+                self.cache.put_many(durations)
+        
+        return durations
+    
+    def _lookup_cached(self, video_ids, durations):
+        """Fill durations from the cache and return the IDs still missing"""
+        if self.cache is None or not video_ids:
+            return video_ids
+        
+        with self.metrics.span('cache_read'):
+            cached = self.cache.get_many(video_ids)
+        durations.update(cached)
+        
+        if self.metrics.enabled:
+            self.metrics.count('yt_cache_lookups_total', len(cached), cache='durations',
+                               result='hit')
+            self.metrics.count('yt_cache_lookups_total', len(video_ids) - len(cached),
+                               cache='durations', result='miss')
+        return [video_id for video_id in video_ids if video_id not in cached]
+    
+    def _collect_durations(self, lookups, durations, stop_event, cancel_event=None):
+        """Wait for lookups, merging them into durations if given; cancel all on an error"""
+        try:
+            for lookup in as_completed(lookups):
+                result = lookup.result()
+                if durations is not None:
+                    durations.update(result)
+                check_cancelled(cancel_event)
+            check_cancelled(cancel_event)
+        except Exception:
+            stop_event.set()
+            for lookup in lookups:
+                lookup.cancel()
+            raise
+    
+    def calculate(self, url, start=1, end=None, speeds=DEFAULT_SPEEDS, progress=None,
+                  cancel_event=None, overrides=None, include_videos=True):
+        """Calculate the viewing time of a playlist (or a 1-based video range of it)
+        
+        With include_videos=False the result has no per-video 'videos' list.
+        """
+        playlist_id = extract_playlist_id(url)
+        if not playlist_id:
+            raise Exception("Invalid playlist URL format")
+        
+        start_idx = max(1, start) - 1
+        
+        # Get playlist videos and durations (pipelined)
+        with self.metrics.span('fetch_playlist'):
+            columns, total_videos = self.get_playlist_with_durations(
+                playlist_id, start_idx, end, progress, cancel_event
+            )
+        
+        with self.metrics.span('summarize'):
+            result = self._summarize(playlist_id, columns, total_videos,
+                                     start_idx, end, speeds, overrides, include_videos)
+            # Fewer videos than asked for means pagination reached the last page
+            complete = end is None or len(columns) < end
+            self._store_index(playlist_id, columns, total_videos, start_idx, complete)
+        return result
+    
+    def range_summary(self, url, start=1, end=None, speeds=DEFAULT_SPEEDS, overrides=None,
+                      max_age=None, include_videos=True):
+        """Answer a range from the prefix-sum index of an earlier fetch
+        
+        Returns a calculate()-style result without any network calls, or
+        None if no earlier fetch covers the range. With max_age only an
+        index fetched in this process within max_age seconds is used.
+        """
+        playlist_id = extract_playlist_id(url)
+        if not playlist_id:
+            return None
+        
+        index = self.indexes.get(playlist_id)
+        if index is None and self.snapshots is not None:
+            index = self.snapshots.load_index(playlist_id)
+            if index is not None:
+                self.indexes[playlist_id] = index
+        
+        # An index built without titles can't back a titled breakdown
+        if index is None or (self.include_titles and index.columns.titles is None):
+            return None
+        if max_age is not None and index.built_at < time.time() - max_age:
+            return None
+        return index.summarize(start, end, speeds, overrides, include_videos)
+    
+    def _store_index(self, playlist_id, columns, total_videos, start_idx, complete=False):
+        """Index the fetched stretch of a playlist and persist it"""
+        fetched = columns if start_idx == 0 else columns.slice(start_idx)
+        index = PrefixSumIndex(playlist_id, total_videos, start_idx, fetched, complete=complete)
+        
+        # The newest fetch wins, even if an older index covered more videos
+        self.indexes[playlist_id] = index
+        if self.snapshots is not None:
+            self.snapshots.save_index(index)
+    
+    def calculate_batch(self, urls, start=1, end=None, speeds=DEFAULT_SPEEDS,
+                        max_playlists=PLAYLIST_WORKERS, cancel_event=None, overrides=None,
+                        include_videos=True):
+        """Calculate many playlists in one run
+        
+        Playlists are paginated concurrently, then every distinct video ID
+        across all of them is looked up once. Playlists that fail, in
+        pagination or in a duration lookup for one of their videos, are
+        reported with an 'error' key instead of aborting the batch.
+        """
+        start_idx = max(1, start) - 1
+        
+        # The same playlist listed twice is only fetched once
+        playlist_ids = {}
+        for url in urls:
+            playlist_ids[url] = extract_playlist_id(url)
+        unique_ids = list(dict.fromkeys(pid for pid in playlist_ids.values() if pid))
+        
+        def list_playlist(playlist_id):
+            columns = VideoColumns(keep_titles=self.include_titles)
+            total_videos = 0
+            with self.metrics.span('list_playlist'):
+                for page, total_videos in self.iter_playlist_pages(playlist_id):
+                    check_cancelled(cancel_event)
+                    columns.append_page(page)
+                    if end is not None and len(columns) >= end:
+                        columns.truncate(end)
+                        break
+            return columns, max(total_videos, len(columns))
+        
+        listings = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max_playlists) as executor:
+            futures = {executor.submit(list_playlist, pid): pid for pid in unique_ids}
+            for future in as_completed(futures):
+                playlist_id = futures[future]
+                try:
+                    listings[playlist_id] = future.result()
+                except Exception as e:
+                    errors[playlist_id] = str(e)
+        check_cancelled(cancel_event)
+        
+        # Look up each distinct video once
+        video_ids = list(dict.fromkeys(
+            video_id
+            for columns, _ in listings.values()
+            for video_id in columns.ids(start_idx, end)
+        ))
+        lookup_errors = {}
+        with self.metrics.span('fetch_durations'):
+            durations = self.get_video_durations(video_ids, cancel_event, lookup_errors)
+        
+        playlists = []
+        total_seconds = 0
+        times = [0.0] * len(speeds)
+        for url, playlist_id in playlist_ids.items():
+            if not playlist_id:
+                playlists.append({'url': url, 'error': "Invalid playlist URL format"})
+                continue
+            if playlist_id in errors:
+                playlists.append({'url': url, 'playlist_id': playlist_id,
+                                  'error': errors[playlist_id]})
+                continue
+            
+            columns, total_videos = listings[playlist_id]
+            failed = lookup_errors and next(
+                (lookup_errors[video_id] for video_id in columns.ids(start_idx, end)
+                 if video_id in lookup_errors), None)
+            if failed:
+                playlists.append({'url': url, 'playlist_id': playlist_id,
+                                  'error': f"Duration lookup failed: {failed}"})
+                continue
+            
+            columns.fill_durations(durations, start_idx, end)
+            try:
+                result = self._summarize(playlist_id, columns, total_videos,
+                                         start_idx, end, speeds, overrides, include_videos)
+            except Exception as e:
+                playlists.append({'url': url, 'playlist_id': playlist_id, 'error': str(e)})
+                continue
+            
+            result['url'] = url
+            playlists.append(result)
+            total_seconds += result['total_seconds']
+            times = [a + row['seconds'] for a, row in zip(times, result['speeds'])]
+        
+        return {
+            'playlists': playlists,
+            'total_seconds': total_seconds,
+            'unique_videos': len(video_ids),
+            'unique_seconds': sum(durations.values()),
+            'speeds': calculate_speeds(total_seconds, speeds, times),
+        }
+    
+    def _summarize(self, playlist_id, columns, total_videos, start_idx, end, speeds,
+                   overrides=None, include_videos=True):
+        """Aggregate the selected range of a fetched playlist"""
+        if total_videos == 0:
+            raise Exception("No videos found or playlist is private")
+        
+        # Apply range filtering
+        end_idx = len(columns) if end is None else min(end, len(columns))
+        
+        # Calculate total time straight from the duration column
+        total_seconds = columns.total_seconds(start_idx, end_idx)
+        
+        if total_seconds == 0:
+            raise Exception("No valid video durations found")
+        
+        return range_result(playlist_id, total_videos, columns, start_idx, end_idx,
+                            total_seconds, speeds, overrides, include_videos=include_videos)
+    
+    def close(self):
+        self.client.close()
+        if self.cache is not None:
+            self.cache.close()
+            self.snapshots.close()
+
+class CalculationJob:
+    """One calculation run that can be cancelled, observed and waited on"""
+    def __init__(self, key):
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.result = None
+        self.error = None
+        
+        self.lock = threading.Lock()
+        self.done_callbacks = []
+        self.progress_callbacks = []
+        
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+        
+    def cancel(self):
+        self.cancel_event.set()
+        
+    def done(self):
+        return self.done_event.is_set()
+        
+    def wait(self, timeout=None):
+        """Wait for the job and return its result (or raise its error)"""
+        if not self.done_event.wait(timeout):
+            raise TimeoutError("Calculation still running")
+        if self.error is not None:
+            raise self.error
+        return self.result
+        
+    def add_done_callback(self, callback):
+        """Call callback(job) when the job finishes (at once if it already has)"""
+        with self.lock:
+            if not self.done_event.is_set():
+                self.done_callbacks.append(callback)
+                return
+        callback(self)
+        
+    def add_progress_callback(self, callback):
+        with self.lock:
+            self.progress_callbacks.append(callback)
+        
+    def publish_progress(self, event):
+        # A cancelled job keeps quiet while its last request drains
+        if self.cancelled:
+            return
+        with self.lock:
+            callbacks = list(self.progress_callbacks)
+        for callback in callbacks:
+            callback(event)
+        
+    def finish(self, result=None, error=None):
+        with self.lock:
+            self.result = result
+            self.error = error
+            self.done_event.set()
+            callbacks, self.done_callbacks = self.done_callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+class JobManager:
+    """Single-flight calculation jobs on top of a PlaylistCalculator
+    
+    Requests for the same playlist, range and speeds share one running job
+    instead of starting another. With exclusive=True starting a different
+    job cancels the ones still running.
+    """
+    def __init__(self, calculator, exclusive=True):
+        self.calculator = calculator
+        self.exclusive = exclusive
+        self.lock = threading.Lock()
+        self.jobs = {}  # key -> running CalculationJob
+        
+    def submit(self, url, start=1, end=None, speeds=DEFAULT_SPEEDS, on_done=None,
+               progress=None, overrides=None, include_videos=True):
+        """Start (or join) a calculation and return its CalculationJob"""
+        key = (extract_playlist_id(url) or url, max(1, start), end, tuple(speeds),
+               tuple(sorted((overrides or {}).items())), include_videos)
+        
+        with self.lock:
+            job = self.jobs.get(key)
+            is_new = job is None or job.cancelled
+            if is_new:
+                if self.exclusive:
+                    for running in self.jobs.values():
+                        running.cancel()
+                    self.jobs.clear()
+                job = CalculationJob(key)
+                self.jobs[key] = job
+            
+            if progress is not None:
+                job.add_progress_callback(progress)
+        
+        if on_done is not None:
+            job.add_done_callback(on_done)
+        
+        if is_new:
+            thread = threading.Thread(target=self._run,
+                                      args=(job, url, start, end, speeds, overrides,
+                                            include_videos))
+            thread.daemon = True
+            thread.start()
+        return job
+        
+    def _run(self, job, url, start, end, speeds, overrides=None, include_videos=True):
+        result = None
+        error = None
+        try:
+            result = self.calculator.calculate(url, start, end, speeds,
+                                               progress=job.publish_progress,
+                                               cancel_event=job.cancel_event,
+                                               overrides=overrides,
+                                               include_videos=include_videos)
+        except Exception as e:
+            error = e
+        
+        # Forget the job before anyone is told, so a resubmit starts fresh
+        with self.lock:
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+        job.finish(result, error)
+        
+    def cancel_all(self):
+        with self.lock:
+            for job in self.jobs.values():
+                job.cancel()
+            self.jobs.clear()
+
+def check_cancelled(cancel_event):
+    """Raise CalculationCancelled if the cancel event has been set"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise CalculationCancelled("Calculation cancelled")
+
+def extract_playlist_id(url):
+    """Extract playlist ID from YouTube URL"""
+    patterns = [
+        r'[?&]list=([a-zA-Z0-9_-]+)',
+        r'playlist\?list=([a-zA-Z0-9_-]+)'
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    
+    # Accept a bare playlist ID as well
+    if re.fullmatch(r'[a-zA-Z0-9_-]{10,}', url.strip()):
+        return url.strip()
+    return None
+
+def extract_channel(text):
+    """Split a channel handle, ID or URL into a channels.list filter
+    
+    Returns ('forHandle', '@name'), ('id', 'UC...') or (None, None).
+    """
+    text = text.strip()
+    match = (re.search(r'youtube\.com/channel/(UC[a-zA-Z0-9_-]{22})', text)
+             or re.fullmatch(r'(UC[a-zA-Z0-9_-]{22})', text))
+    if match:
+        return 'id', match.group(1)
+    
+    match = (re.search(r'youtube\.com/(@[\w.-]+)', text)
+             or re.fullmatch(r'(@[\w.-]{3,30})', text))
+    if match:
+        return 'forHandle', match.group(1)
+    return None, None
+
+def parse_duration(duration):
+    """Parse ISO 8601 duration to seconds (0 if it can't be parsed)"""
+    match = TIME_DURATION_PATTERN.fullmatch(duration)
+    if match is not None:
+        hours, minutes, seconds = match.groups('0')
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    
+    match = DURATION_PATTERN.fullmatch(duration)
+    if match is None:
+        return 0
+    
+    years, months, weeks, days, hours, minutes, seconds = match.groups()
+    total = 0
+    if years:
+        total += int(years) * 31536000
+    if months:
+        total += int(months) * 2592000
+    if weeks:
+        total += int(weeks) * 604800
+    if days:
+        total += int(days) * 86400
+    if hours:
+        total += int(hours) * 3600
+    if minutes:
+        total += int(minutes) * 60
+    if seconds:
+        total += int(seconds)
+    return total
+
+def parse_durations(durations):
+    """Parse a batch of ISO 8601 durations into a compact array('I') of seconds
+    
+    The batch is matched in one regex scan over the joined lines, so the
+    usual PT#H#M#S strings cost no per-string regex call; other forms (P0D,
+    P1DT2H) go through parse_duration one by one.
+    """
+    text = "\n".join(durations)
+    found = TIME_DURATION_LINES.findall(text)
+    if len(found) != len(durations) or text.count("\n") != len(durations) - 1:
+        # Empty strings or embedded newlines: the lines don't line up
+        return array('I', map(parse_duration, durations))
+    return array('I', [
+        parse_duration(other) if other
+        else (int(hours) * 3600 if hours else 0) + (int(minutes) * 60 if minutes else 0)
+        + (int(seconds) if seconds else 0)
+        for hours, minutes, seconds, other in found
+    ])
+
+def format_time(seconds):
+    """Format seconds to readable time"""
+    td = timedelta(seconds=int(seconds))
+    hours, remainder = divmod(td.seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    
+    if td.days > 0:
+        return f"{td.days}d {hours}h {minutes}m"
+    elif hours > 0:
+        return f"{hours}h {minutes}m"
+    else:
+        return f"{minutes}m {seconds}s"
+
+def calculate_speeds(total_seconds, speeds=DEFAULT_SPEEDS, times=None):
+    """Viewing time and time saved at each playback speed
+    
+    times, if given, are precomputed viewing times per speed (for example
+    from speed_totals() with per-video overrides).
+    """
+    if times is None:
+        times = [total_seconds / speed for speed in speeds]
+    results = []
+    for speed, time_at_speed in zip(speeds, times):
+        results.append({
+            'speed': speed,
+            'seconds': time_at_speed,
+            'saved_seconds': total_seconds - time_at_speed,
+        })
+    return results
+
+def speed_range(low, high, step=SPEED_STEP):
+    """Speeds from low to high inclusive in fixed steps, e.g. 0.25x to 4x by 0.25"""
+    if step <= 0:
+        raise Exception("Speed step must be positive")
+    if high < low:
+        raise Exception(f"Invalid speed range: {low}-{high}")
+    count = int((high - low) / step + 1e-9) + 1
+    return [round(low + i * step, 4) for i in range(count)]
+
+def parse_speed_set(text):
+    """Parse a speed set such as '1, 1.5, 2', '0.25-4:0.25' or a mix of both
+    
+    Ranges are written low-high[:step] with SPEED_STEP as the default step.
+    A trailing 'x' is allowed. The result is sorted and free of duplicates.
+    """
+    speeds = set()
+    for part in text.lower().replace("x", "").replace(" ", "").split(","):
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                bounds, _, step = part.partition(":")
+                low, _, high = bounds.partition("-")
+                speeds.update(speed_range(float(low), float(high),
+                                          float(step) if step else SPEED_STEP))
+            else:
+                speeds.add(float(part))
+        except ValueError:
+            raise Exception(f"Invalid playback speed: {part!r}")
+    
+    if not speeds:
+        raise Exception("No playback speeds given")
+    if min(speeds) < MIN_SPEED or max(speeds) > MAX_SPEED:
+        raise Exception(f"Playback speeds must be between {MIN_SPEED}x and {MAX_SPEED}x")
+    return sorted(speeds)
+
+def parse_speed_overrides(text):
+    """Parse per-video speeds such as 'VIDEO_ID=1, OTHER_ID=1.5' into a dict"""
+    overrides = {}
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        video_id, _, value = part.partition("=")
+        try:
+            speed = float(value.lower().rstrip("x"))
+        except ValueError:
+            raise Exception(f"Invalid speed override: {part!r}")
+        if not video_id or not MIN_SPEED <= speed <= MAX_SPEED:
+            raise Exception(f"Invalid speed override: {part!r}")
+        overrides[video_id] = speed
+    return overrides
+
+def range_result(playlist_id, total_videos, columns, lo, hi, total_seconds, speeds,
+                 overrides=None, offset=0, include_videos=True):
+    """The calculate()-style result for positions lo..hi-1 of columns
+    
+    offset is the playlist position of the first column, so the result's
+    start/end and video indexes are 1-based playlist positions. The
+    per-video 'videos' rows are only built with include_videos.
+    """
+    # Overridden videos need the full matrix; otherwise the total is enough
+    times = None
+    if overrides:
+        fixed = [overrides.get(video_id, 0) for video_id in columns.ids(lo, hi)]
+        times = speed_totals(columns.seconds[lo:hi], speeds, fixed)
+    
+    result = {
+        'playlist_id': playlist_id,
+        'total_videos': total_videos,
+        'start': offset + lo + 1,
+        'end': offset + hi,
+        'total_seconds': total_seconds,
+        'speeds': calculate_speeds(total_seconds, speeds, times),
+    }
+    if include_videos:
+        result['videos'] = columns.rows(lo, hi, offset)
+        mark_overrides(result['videos'], overrides)
+    return result
+
+def wire_bytes(response):
+    """Body bytes a response took on the wire (before gzip is undone)"""
+    # urllib3 counts the raw bytes it read; fixtures and stubs have no raw stream
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        return raw.tell()
+    length = response.headers.get("Content-Length")
+    return int(length) if length else len(response.content)
+
+def mark_overrides(videos, overrides):
+    """Record the fixed speed of overridden videos in a result's video list"""
+    if overrides:
+        for video in videos:
+            if video['id'] in overrides:
+                video['speed'] = overrides[video['id']]
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """numpy, imported on first use (it is optional and slow to import), or None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def speed_matrix(seconds, speeds, overrides=None):
+    """Viewing time of every video (rows) at every playback speed (columns)
+    
+    overrides holds one speed per video (0 for none); an overridden video
+    plays at its own speed in every column. With numpy this is a single
+    broadcast division returning an ndarray, otherwise a list of rows.
+    """
+    np = _numpy()
+    if np is not None:
+        durations = np.asarray(seconds, dtype=np.float64)[:, None]
+        divisors = np.asarray(speeds, dtype=np.float64)[None, :]
+        if overrides is not None:
+            fixed = np.asarray(overrides, dtype=np.float64)[:, None]
+            divisors = np.where(fixed > 0, fixed, divisors)
+        return durations / divisors
+    
+    if overrides is None:
+        overrides = [0] * len(seconds)
+    return [[value / (fixed or speed) for speed in speeds]
+            for value, fixed in zip(seconds, overrides)]
+
+def speed_totals(seconds, speeds, overrides=None):
+    """Total viewing time at each speed (the column sums of speed_matrix)"""
+    # Without overrides every column is just the total over the speed
+    if not overrides or not any(overrides):
+        total = sum(seconds)
+        return [total / speed for speed in speeds]
+    
+    matrix = speed_matrix(seconds, speeds, overrides)
+    if _numpy() is not None:
+        return matrix.sum(axis=0).tolist()
+    return [sum(column) for column in zip(*matrix)] or [0.0] * len(speeds)
+
+def cumulative_speed_matrix(seconds, speeds, overrides=None):
+    """Running viewing time at each speed after each video"""
+    matrix = speed_matrix(seconds, speeds, overrides)
+    if _numpy() is not None:
+        return matrix.cumsum(axis=0)
+    
+    running = [0.0] * len(speeds)
+    rows = []
+    for row in matrix:
+        running = [total + value for total, value in zip(running, row)]
+        rows.append(running)
+    return rows
@@ -0,0 +1,302 @@
+"""Local HTTP service for the playlist time calculator
+
+Serves playlist totals as JSON to dashboards and scripts, using the same
+headless core as the GUI and CLI:
+
+    python server.py --port 8080
+    curl "http://127.0.0.1:8080/playlist/PLxxxx?start=5&end=20&speeds=1,1.5,2"
+
+Endpoints:
+    GET /playlist/{id}?start=&end=&speeds=&videos=1
+        Totals for a playlist or a 1-based video range. speeds takes the
+        same lists and ranges as the CLI; videos=1 adds the per-video list.
+    GET /health
+        Cache, job and quota counters.
+
+All requests share one calculator (one pooled upstream client). Results
+are kept in an in-memory cache for --ttl seconds. A playlist is fetched
+whole, once, however many clients ask for it at the same time and with
+whatever range, speeds or videos flag; every client is then answered
+from the prefix-sum index that fetch leaves behind.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from playlist_core import (
+    PlaylistCalculator, JobManager, APIError, DEFAULT_SPEEDS, DURATION_WORKERS,
+    HTTP_POOL_SIZE, extract_playlist_id, parse_speed_set,
+)
+from api_fixtures import ReplayTransport, SyntheticTransport
+
+RESPONSE_TTL = 300  # seconds a result is served from memory
+RESPONSE_CACHE_SIZE = 1000  # cached results kept at most
+REQUEST_TIMEOUT = 300  # seconds a client waits for a fetch to finish
+
+
+class ResponseCache:
+    """In-memory LRU of calculation results with a time-to-live
+
+    Each entry keeps the result and its encoded JSON bodies, so a cache hit
+    costs a dictionary lookup rather than a serialization.
+    """
+
+    def __init__(self, ttl=RESPONSE_TTL, max_entries=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> [expires, result, {'json': body}]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (result, bodies, seconds left) for a fresh entry, or None"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2], entry[0] - now
+
+    def put(self, key, result):
+        """Store a result and return its (result, bodies, seconds left)"""
+        entry = [time.monotonic() + self.ttl, result, {}]
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result, entry[2], self.ttl
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class PlaylistService:
+    """Coalescing, caching front end to one PlaylistCalculator"""
+
+    def __init__(self, calculator, ttl=RESPONSE_TTL, max_entries=RESPONSE_CACHE_SIZE,
+                 timeout=REQUEST_TIMEOUT):
+        self.calculator = calculator
+        self.jobs = JobManager(calculator, exclusive=False)
+        self.cache = ResponseCache(ttl, max_entries)
+        self.timeout = timeout
+        self.started = time.time()
+
+    def playlist(self, playlist_id, start=1, end=None, speeds=DEFAULT_SPEEDS,
+                 include_videos=False):
+        """Return (encoded JSON body, cache status, seconds the body stays fresh)"""
+        # Per-video rows are only built for requests that ask for them
+        key = (playlist_id, start, end, tuple(speeds), include_videos)
+        cached = self.cache.get(key)
+        status = "HIT"
+
+        if cached is None:
+            # Ranges inside a recent fetch need no upstream request at all
+            result = self.summary(playlist_id, start, end, speeds, include_videos)
+            status = "INDEX"
+            if result is None:
+                # A fresh index of the whole playlist means the range is outside it
+                if not self.fetched(playlist_id):
+                    self.fetch(playlist_id)
+                    status = "MISS"
+                result = self.summary(playlist_id, start, end, speeds, include_videos)
+                if result is None:
+                    raise Exception("Video range is outside the playlist")
+            cached = self.cache.put(key, result)
+
+        result, bodies, fresh_for = cached
+        body = bodies.get('json')
+        if body is None:
+            body = bodies['json'] = json.dumps(result).encode()
+        return body, status, fresh_for
+
+    def summary(self, playlist_id, start, end, speeds, include_videos):
+        return self.calculator.range_summary(playlist_id, start, end, speeds,
+                                             max_age=self.cache.ttl,
+                                             include_videos=include_videos)
+
+    def fetched(self, playlist_id):
+        """True if the calculator holds a fresh index of the whole playlist"""
+        index = self.calculator.indexes.get(playlist_id)
+        return (index is not None and index.complete and index.offset == 0
+                and index.built_at >= time.time() - self.cache.ttl)
+
+    def fetch(self, playlist_id):
+        """Fetch a whole playlist into the calculator's index, sharing running fetches"""
+        # The job key only varies with the playlist: range, speeds and the
+        # videos flag don't change what is fetched upstream. A client that
+        # times out doesn't cancel it, so the index is still filled.
+        self.jobs.submit(playlist_id, include_videos=False).wait(self.timeout)
+
+    def health(self):
+        scheduler = self.calculator.client.scheduler
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'running_jobs': len(self.jobs.jobs),
+            'quota_used': scheduler.quota_used,
+            'retries': scheduler.retries,
+        }
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the server's PlaylistService"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+
+        if parts == ["health"]:
+            self.send_json(200, json.dumps(self.server.service.health()).encode())
+        elif len(parts) == 2 and parts[0] == "playlist":
+            self.get_playlist(parts[1], query)
+        else:
+            self.send_error_json(404, "Not found")
+
+    def get_playlist(self, playlist, query):
+        playlist_id = extract_playlist_id(playlist)
+        if not playlist_id:
+            self.send_error_json(400, "Invalid playlist ID")
+            return
+
+        try:
+            start = int(query.get('start', ['1'])[0] or 1)
+            end = int(query['end'][0]) if query.get('end', [''])[0] else None
+        except ValueError:
+            self.send_error_json(400, "start and end must be whole numbers")
+            return
+        if start < 1 or (end is not None and end < start):
+            self.send_error_json(400, "Invalid video range")
+            return
+
+        try:
+            speeds = parse_speed_set(query['speeds'][0]) if 'speeds' in query else DEFAULT_SPEEDS
+        except Exception as e:
+            self.send_error_json(400, str(e))
+            return
+        include_videos = query.get('videos', ['0'])[0] in ("1", "true", "yes")
+
+        try:
+            body, status, fresh_for = self.server.service.playlist(
+                playlist_id, start, end, speeds, include_videos
+            )
+        except TimeoutError:
+            self.send_error_json(504, "Calculation still running; retry later")
+            return
+        except APIError as e:
+            self.send_error_json(502, str(e))
+            return
+        except Exception as e:
+            self.send_error_json(422, str(e))
+            return
+
+        self.send_json(200, body, {"X-Cache": status,
+                                   "Cache-Control": f"max-age={max(0, int(fresh_for))}"})
+
+    def send_json(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_json(status, json.dumps({'error': message}).encode())
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PlaylistServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, host="127.0.0.1", port=8080, verbose=False):
+        super().__init__((host, port), ServiceHandler)
+        self.service = service
+        self.verbose = verbose
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Serve YouTube playlist viewing times over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY", ""),
+                        help="YouTube Data API v3 key (default: $YOUTUBE_API_KEY)")
+    parser.add_argument("--ttl", type=float, default=RESPONSE_TTL,
+                        help="seconds results are served from memory (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=RESPONSE_CACHE_SIZE,
+                        help="results kept in memory (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DURATION_WORKERS,
+                        help="concurrent duration lookups per fetch (default: %(default)s)")
+    parser.add_argument("--pool-size", type=int, default=HTTP_POOL_SIZE,
+                        help="upstream HTTP connections kept open (default: %(default)s)")
+    parser.add_argument("--quota-limit", type=int, default=None,
+                        help="stop before spending more than this many API quota units")
+    parser.add_argument("--titles", action="store_true",
+                        help="fetch video titles for videos=1 responses")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't read or write the local duration cache")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    offline = parser.add_mutually_exclusive_group()
+    offline.add_argument("--replay", metavar="DIR",
+                         help="answer upstream requests from fixtures in DIR")
+    offline.add_argument("--synthetic", type=int, metavar="N",
+                         help="serve generated playlists of N videos instead of the API")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    transport = None
+    if args.replay:
+        transport = ReplayTransport(args.replay)
+    elif args.synthetic is not None:
+        transport = SyntheticTransport(videos=args.synthetic)
+
+    if not args.api_key and transport is None:
+        print("error: an API key is required (--api-key or YOUTUBE_API_KEY)", file=sys.stderr)
+        return 2
+
+    calculator = PlaylistCalculator(api_key=args.api_key, pool_size=args.pool_size,
+                                    max_workers=args.workers, include_titles=args.titles,
+                                    use_cache=not args.no_cache and transport is None,
+                                    quota_limit=args.quota_limit, transport=transport)
+    service = PlaylistService(calculator, ttl=args.ttl, max_entries=args.cache_size)
+    server = PlaylistServer(service, args.host, args.port, verbose=args.verbose)
+
+    print(f"Serving playlist totals on http://{args.host}:{server.server_address[1]}/playlist/ID")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        calculator.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())